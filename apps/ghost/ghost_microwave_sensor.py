@@ -11,17 +11,16 @@
 # Released under the MIT license
 import neopixel, random, time
 from ghost_neo import Ghost
+from panel import n, m
+from frame_sched import FrameScheduler
 from machine import UART, Pin
 from ld2410 import LD2410
-import _thread
+import aiorun
 
 
 uart = UART(1, baudrate=256000, tx=Pin(8), rx=Pin(9), timeout=20)
 sensor = LD2410(uart, led_pin=25, flush_on_read=False)
 
-n = 16 # number of row
-m = 16 # number of col
-
 red = 16, 0, 0
 blue = 0, 0, 24
 
@@ -40,6 +39,8 @@ colors = ((16, 0, 0), (15, 1, 0), (14, 2, 0), (13, 3, 0),
 np = neopixel.NeoPixel(Pin(20), n * m)
 ghost = Ghost(np)
 direction = ('ahead', 'up', 'down', 'right', 'left')
+# період погляду залежить від дистанції (get_speed), кадри - за дедлайнами
+sched = FrameScheduler(period_ms=200)
 
 # init of the distance 
 sensor_ok = sensor.probe()
@@ -74,43 +75,37 @@ def get_speed(dist):
             return speed[i]
     return 200
 
-def get_dist(sensor):
+def on_report(meas):
+    # викликається задачею aiorun.ld2410_task для кожного кадру сенсора
     global dist
-    while True:
-        try:
-            meas = sensor.read_report(print_hex=False)
-            if meas is None:
-                time.sleep_ms(20)
-                continue
-
-            if meas.get("moving_energy", 0) >= ENERGY_TRIGGER:
-                dist = meas.get("detection_distance", dist)
-
-            time.sleep_ms(20)
-
-        except Exception:
-            # будь-яка апаратна/протокольна аномалія -> потік не зупиняється
-            time.sleep_ms(200)
+    if meas.get("moving_energy", 0) >= ENERGY_TRIGGER:
+        dist = meas.get("detection_distance", dist)
             
             
 def main_run():
     body_color, pupils_color = get_colors()
     ghost.look(random.choice(direction), body_color, pupils_color)
-    time.sleep_ms(get_speed(dist))
+
+async def render():
+    sched.start()
+    while True:
+        sched.set_period_ms(get_speed(dist))
+        if await aiorun.due(sched):
+            main_run()
     
 def clean_up():
     # to clean the led-matrix
-    for pix in range(n * m):
-        np[pix] = 0, 0, 0
-    np.write()
+    ghost.fb.clear()
+    ghost.fb.commit(np, force=True)
 
 
 if __name__ == '__main__':
     
-    # measuring the distance in the second thread
+    # рендер і читання сенсора - задачі asyncio в одному потоці (core1 вільне)
+    tasks = [render()]
     if sensor_ok:
-        _thread.start_new_thread(get_dist, (sensor,))
-    
-    while True:
-        main_run()
+        tasks.append(aiorun.ld2410_task(sensor, on_report))
+    if 'switcher' in globals():
+        tasks.append(switcher.serve())
+    aiorun.run(*tasks)
 
@@ -8,9 +8,13 @@
 # Released under the MIT license
 
 import neopixel, random, time
+import machine
+from np_utils import Framebuffer
+from panel import n, m, geo, coord_to_pix, coord_to_offset
+import sprite
+import frame_sched
 
-n = 16 # number of row
-m = 16 # number of col
+fps = 5 # looks per second
 
 green = 0, 24, 0
 green_ellow = 6, 10, 0
@@ -66,57 +70,53 @@ pupils_pos_down = (8,4), (9,4), (8,5), (9,5), (8,10), (9,10), (8,11), (9,11)
 pupils_pos_right = (6,6), (7,6), (6,7), (7,7), (6,12), (7,12), (6,13), (7,13)
 pupils_pos_left = (6,2), (7,2), (6,3), (7,3), (6,8), (7,8), (6,9), (7,9)
 
-def coord_to_pix(i, j):
-    '''отримує координати матриці (row x col) row = i, col =  j
-       вертає neopixel-значення LED-матриці
-    '''
-    return m * i + j if i % 2 else m-j-1 + m * i
-
-# create pixels for NeoPixel matrix
-body_pix = {coord_to_pix(i, j) for i, j in body_pos}
-eyes_ahead_pix = {coord_to_pix(i, j) for i, j in eyes_pos_ahead}
-eyes_up_pix = {coord_to_pix(i, j) for i, j in eyes_pos_up}
-eyes_right_pix = {coord_to_pix(i, j) for i, j in eyes_pos_right}
-eyes_left_pix = {coord_to_pix(i, j) for i, j in eyes_pos_left}
-pupils_ahead_pix = {coord_to_pix(i, j) for i, j in pupils_pos_ahead}
-pupils_up_pix = {coord_to_pix(i, j) for i, j in pupils_pos_up}
-pupils_down_pix = {coord_to_pix(i, j) for i, j in pupils_pos_down}
-pupils_right_pix = {coord_to_pix(i, j) for i, j in pupils_pos_right}
-pupils_left_pix = {coord_to_pix(i, j) for i, j in pupils_pos_left}
+# sprites: таблиці координат, скомпільовані у зсуви/ділянки кадрового буфера.
+# Якщо на платі є заморожений модуль ghost_sprites.py (host/freeze_sprites.py),
+# таблиці лише імпортуються, без обчислень на старті.
+SPRITES_MODULE = 'ghost_sprites'
+SPRITES = sprite.load(SPRITES_MODULE)
+if SPRITES is None:
+    SPRITES = {
+        'body': sprite.from_coords(body_pos, coord_to_offset),
+        'eyes_ahead': sprite.from_coords(eyes_pos_ahead, coord_to_offset),
+        'eyes_up': sprite.from_coords(eyes_pos_up, coord_to_offset),
+        'eyes_right': sprite.from_coords(eyes_pos_right, coord_to_offset),
+        'eyes_left': sprite.from_coords(eyes_pos_left, coord_to_offset),
+        'pupils_ahead': sprite.from_coords(pupils_pos_ahead, coord_to_offset),
+        'pupils_up': sprite.from_coords(pupils_pos_up, coord_to_offset),
+        'pupils_down': sprite.from_coords(pupils_pos_down, coord_to_offset),
+        'pupils_right': sprite.from_coords(pupils_pos_right, coord_to_offset),
+        'pupils_left': sprite.from_coords(pupils_pos_left, coord_to_offset),
+    }
 
 
 class Ghost:
 
     def __init__(self, neopixel):
         self.np = neopixel  # instance of neopixel.NeoPixel class
-        self.body_pix = body_pix
-        self.eyes_ahead_pix = eyes_ahead_pix
-        self.eyes_up_pix = eyes_up_pix
-        self.eyes_right_pix = eyes_right_pix
-        self.eyes_left_pix = eyes_left_pix
-        self.pupils_ahead_pix = pupils_ahead_pix
-        self.pupils_up_pix = pupils_up_pix
-        self.pupils_down_pix = pupils_down_pix
-        self.pupils_right_pix = pupils_right_pix
-        self.pupils_left_pix = pupils_left_pix
-        self.dir_eyes = {'up': self.eyes_up_pix, 'ahead': self.eyes_ahead_pix,
-                        'down': self.eyes_ahead_pix, 'right': self.eyes_right_pix,
-                        'left': self.eyes_left_pix}
-        self.dir_pupils = {'up': self.pupils_up_pix, 'ahead': self.pupils_ahead_pix,
-                          'down': self.pupils_down_pix, 'right': self.pupils_right_pix,
-                          'left': self.pupils_left_pix}
+        # кадр малюється у fb; якщо погляд і кольори не змінились - write() пропускається
+        self.fb = Framebuffer(n, m, geo)
+        self.body = SPRITES['body']
+        self.dir_eyes = {'up': SPRITES['eyes_up'], 'ahead': SPRITES['eyes_ahead'],
+                        'down': SPRITES['eyes_ahead'], 'right': SPRITES['eyes_right'],
+                        'left': SPRITES['eyes_left']}
+        self.dir_pupils = {'up': SPRITES['pupils_up'], 'ahead': SPRITES['pupils_ahead'],
+                          'down': SPRITES['pupils_down'], 'right': SPRITES['pupils_right'],
+                          'left': SPRITES['pupils_left']}
                 
     def look(self, direction, color, pupils_color):
+        '''
+        малює кадр; вертає 1, якщо кадр відправлено, 0 - кадр не змінився (write() пропущено);
+        кількість змінених пікселів - self.fb.changed (рахується лише при читанні)
+        '''
+        buf = self.fb.buf
         # paint the body
-        for pix in self.body_pix:
-            self.np[pix] = color
+        self.body.fill(buf, color)
         # paint the eyes    
-        for pix in self.dir_eyes[direction]:
-            self.np[pix] = white
+        self.dir_eyes[direction].fill(buf, white)
         # paint the pupils               
-        for pix in self.dir_pupils[direction]:
-            self.np[pix] = pupils_color
-        self.np.write()
+        self.dir_pupils[direction].fill(buf, pupils_color)
+        return self.fb.commit(self.np)
             
 
 if __name__ == '__main__':
@@ -125,9 +125,7 @@ if __name__ == '__main__':
     direction = ('ahead', 'up', 'down', 'right', 'left')
     ghost = Ghost(np)
 
-    while True:
-        ghost.look(random.choice(direction), blue, red)
-        time.sleep_ms(200)
+    frame_sched.run(lambda: ghost.look(random.choice(direction), blue, red), fps)
     
     # to clean the led-matrix:
     '''
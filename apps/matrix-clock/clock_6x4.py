@@ -9,6 +9,10 @@ import neopixel, time, random
 import machine
 from machine import Pin, I2C
 from ds3231_simple import DS3231
+from np_utils import Framebuffer
+from panel import n, m, geo
+import sprite
+import aiorun
 
 
 # Налаштування шини I2C0 для Pico
@@ -17,10 +21,9 @@ i2c = I2C(0, sda=Pin(4), scl=Pin(5), freq=400000)
 
 ds = DS3231(i2c)
 
-n = 16
-m = 16
-
 np = neopixel.NeoPixel(machine.Pin(20), n * m)
+# кадр малюється у fb; незмінені кадри на стрічку не відправляються
+fb = Framebuffer(n, m, geo)
 
 green = 0, 24, 0
 green_ellow = 6, 10, 0
@@ -127,45 +130,47 @@ positions = [
     (9, 8),  # M2
 ]
 
-def coord_to_pix(i, j):
-    return m * i + j if i % 2 else m - j - 1 + m * i
-
-# clock_maps
-clock_maps = []
-for i_off, j_off in positions:
-    pos_map = {
-        dig: tuple(coord_to_pix(i + i_off, j + j_off) for i, j in coords)
-        for dig, coords in digits_coords.items()
-    }
-    clock_maps.append(pos_map)
+# sprites: цифри на позиціях 'p{pos}_{digit}', двокрапка 'colon',
+# 'clear' - усі цифри + двокрапка (гасяться кожен кадр).
+# Якщо на платі є заморожений модуль clock_sprites.py (host/freeze_sprites.py),
+# таблиці лише імпортуються, без обчислень на старті.
+SPRITES_MODULE = 'clock_sprites'
+SPRITES = sprite.load(SPRITES_MODULE)
+if SPRITES is None:
+    SPRITES = {}
+    for pos, (i_off, j_off) in enumerate(positions):
+        for dig, coords in digits_coords.items():
+            SPRITES['p%d_%d' % (pos, dig)] = sprite.Sprite(
+                fb.offset(i + i_off, j + j_off) for i, j in coords)
+    SPRITES['colon'] = sprite.from_coords(((3, 13), (5, 13)), fb.offset)
+    SPRITES['clear'] = SPRITES['colon'].union(*SPRITES.values())
+
+# clock_maps[pos][digit] -> Sprite
+clock_maps = [{dig: SPRITES['p%d_%d' % (pos, dig)] for dig in range(10)}
+              for pos in range(len(positions))]
 
 # colon
-colon_coords = (coord_to_pix(3, 13), coord_to_pix(5, 13))
+colon_sprite = SPRITES['colon']
+clear_sprite = SPRITES['clear']
 colon = 0  # init 
 
 last_perim_pix = None  # init
 
-# perimeter map (60)
+# perimeter map (60), зсуви у fb.buf
 def generate_perimeter_map():
     map_60 = []
     for j in range(16):            # top
-        map_60.append(coord_to_pix(0, j))
+        map_60.append(fb.offset(0, j))
     for i in range(1, 15):         # right
-        map_60.append(coord_to_pix(i, 15))
+        map_60.append(fb.offset(i, 15))
     for j in range(15, -1, -1):    # bottom
-        map_60.append(coord_to_pix(15, j))
+        map_60.append(fb.offset(15, j))
     for i in range(14, 0, -1):     # left
-        map_60.append(coord_to_pix(i, 0))
+        map_60.append(fb.offset(i, 0))
     return map_60
 
 perimeter_map = generate_perimeter_map()
 
-# pixels to clear each frame (digits + colon only), perimeter untouched 
-clear_pixels = set(colon_coords)
-for pos_map in clock_maps:
-    for d in range(10):
-        clear_pixels.update(pos_map[d])
-
 def pick_new_perimeter_color(prev):
     if len(perimeter_colors) <= 1:
         return prev
@@ -177,22 +182,19 @@ def pick_new_perimeter_color(prev):
 def draw_clock(hh, mm, ss, color_digits, color_sec, line_sec=True):
     global colon, last_perim_pix
 
-    # clear only the dynamic interior (digits + colon)
-    for pix in clear_pixels:
-        np[pix] = nothing
+    # clear only the dynamic interior (digits + colon), perimeter untouched
+    buf = fb.buf
+    clear_sprite.fill(buf, nothing)
 
     # digits
     digits = (hh // 10, hh % 10, mm // 10, mm % 10)
     for i in range(4):
-        for pix in clock_maps[i][digits[i]]:
-            np[pix] = color_digits
+        clock_maps[i][digits[i]].fill(buf, color_digits)
 
     # perimeter seconds
     if line_sec:
         # накопичення 0..ss 
-        for s in range(ss + 1):
-            if s < len(perimeter_map):
-                np[perimeter_map[s]] = color_sec
+        fb.paint(perimeter_map[:ss + 1], color_sec)
         # у цьому режимі "остання точка" не потрібна
         last_perim_pix = None
     else:
@@ -200,31 +202,32 @@ def draw_clock(hh, mm, ss, color_digits, color_sec, line_sec=True):
         cur_pix = perimeter_map[ss]
 
         if last_perim_pix is not None and last_perim_pix != cur_pix:
-            np[last_perim_pix] = nothing
+            fb.paint((last_perim_pix,), nothing)
 
-        np[cur_pix] = color_sec
+        fb.paint((cur_pix,), color_sec)
         last_perim_pix = cur_pix
 
     # blinking colon
     colon ^= 1
-    for dot in colon_coords:
-        np[dot] = color_digits if colon else nothing
+    colon_sprite.fill(buf, color_digits if colon else nothing)
 
-    np.write()
+    # на стрічку йдуть лише кадри, що відрізняються від попереднього:
+    # 1 - кадр відправлено, 0 - пропущено; кількість змінених пікселів - fb.changed
+    return fb.commit(np)
 
 
-def start_clock(color_digits, line_sec=True):
+def clock_task(color_digits, line_sec=True):
+    '''задача asyncio: кадр малюється на кожній новій секунді RTC'''
     # clear everything once on start
-    np.fill(nothing)
-    np.write()
+    fb.clear()
+    fb.commit(np, force=True)
 
     t0 = ds.datetime()
     last_mm = t0[5]
-    last_ss = -1
     cur_color_sec = random.choice(perimeter_colors)
 
-    while True:
-        t = ds.datetime()
+    def on_tick(t):
+        nonlocal last_mm, cur_color_sec
         hh, mm, ss = t[4], t[5], t[6]
 
         # нова хвилина -> новий колір периметра (без повтору попереднього)
@@ -232,11 +235,17 @@ def start_clock(color_digits, line_sec=True):
             cur_color_sec = pick_new_perimeter_color(cur_color_sec)
             last_mm = mm
 
-        # оновлюємо дисплей тільки при зміні секунди
-        if ss != last_ss:
-            draw_clock(hh, mm, ss, color_digits, cur_color_sec, line_sec)
-            last_ss = ss
+        draw_clock(hh, mm, ss, color_digits, cur_color_sec, line_sec)
 
-        time.sleep_ms(20)  # перевірка раз на 20мс 
+    # RTC читається лише біля межі секунди, а не кожні 20 мс
+    return aiorun.rtc_task(ds, on_tick)
 
-start_clock(green)
+
+def start_clock(color_digits, line_sec=True, *tasks):
+    aiorun.run(clock_task(color_digits, line_sec), *tasks)
+
+if __name__ == '__main__':
+    if 'switcher' in globals():
+        start_clock(green, True, switcher.serve())
+    else:
+        start_clock(green)
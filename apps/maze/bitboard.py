@@ -0,0 +1,146 @@
+# ----------------------------------------------------------------
+# Бітова дошка: стіни лабіринта як один int на рядок
+# ----------------------------------------------------------------
+# Bitboard: maze walls stored as one int per row
+# ----------------------------------------------------------------
+# Released under the MIT license
+
+"""
+Замість множини кортежів (i, j) (десятки байт на клітинку) стіни
+зберігаються бітами: rows[i] - int, біт j - клітинка (i, j), 1 - стіна.
+Для m <= 30 рядок - мале ціле MicroPython (без об'єкта в купі), тож
+дошка 16x16 - список з 16 чисел.
+
+Bitboard підтримує протокол множини стін, з яким працюють генератор і
+застосунки, тому код на кшталт
+
+    if (i, j) not in maze: ...
+    for coord in maze: ...
+    grid.remove((i, j))
+
+не змінюється. Крім того - операції над цілими рядками:
+
+    board.hline(i)              # суцільна горизонтальна лінія (рядок i)
+    board.vline(j, 1, n - 1)    # вертикальна лінія у стовпчику j
+    board.free(i)               # маска прохідних клітинок рядка
+    board.neighbors(i)          # маски (up, down, left, right): у клітинки j
+                                #   прохідний сусід зверху/знизу/ліворуч/праворуч
+    len(board), popcount(x)     # кількість стін / одиниць у масці
+"""
+
+
+def popcount(x):
+    '''кількість одиниць у x >= 0 (у int MicroPython немає bit_count)'''
+    count = 0
+    while x:
+        x &= x - 1
+        count += 1
+    return count
+
+
+class Bitboard:
+
+    def __init__(self, n, m, rows=None):
+        self.n = n
+        self.m = m
+        self.full = (1 << m) - 1
+        self.rows = list(rows) if rows is not None else [0] * n
+
+    def copy(self):
+        return Bitboard(self.n, self.m, self.rows)
+
+    # ---------------- клітинки
+    def test(self, i, j):
+        return (self.rows[i] >> j) & 1
+
+    def set(self, i, j):
+        self.rows[i] |= 1 << j
+
+    def clear(self, i, j):
+        self.rows[i] &= ~(1 << j)
+
+    # протокол множини стін {(i, j), ...}
+    def __contains__(self, cell):
+        i, j = cell
+        return 0 <= i < self.n and 0 <= j < self.m and (self.rows[i] >> j) & 1 == 1
+
+    def add(self, cell):
+        self.rows[cell[0]] |= 1 << cell[1]
+
+    def discard(self, cell):
+        self.rows[cell[0]] &= ~(1 << cell[1])
+
+    def remove(self, cell):
+        if cell not in self:
+            raise KeyError(cell)
+        self.discard(cell)
+
+    def __iter__(self):
+        for i in range(self.n):
+            r = self.rows[i]
+            j = 0
+            while r:
+                if r & 1:
+                    yield i, j
+                r >>= 1
+                j += 1
+
+    def __len__(self):
+        count = 0
+        for r in self.rows:
+            count += popcount(r)
+        return count
+
+    def __eq__(self, other):
+        if isinstance(other, Bitboard):
+            return (self.n, self.m, self.rows) == (other.n, other.m, other.rows)
+        return set(self) == other
+
+    # ---------------- цілі рядки
+    def hline(self, i, j0=0, j1=None):
+        '''стіна у рядку i, стовпчики j0..j1-1 (за замовчуванням - увесь рядок)'''
+        j1 = self.m if j1 is None else j1
+        self.rows[i] |= ((1 << (j1 - j0)) - 1) << j0
+
+    def vline(self, j, i0=0, i1=None):
+        '''стіна у стовпчику j, рядки i0..i1-1'''
+        bit = 1 << j
+        for i in range(i0, self.n if i1 is None else i1):
+            self.rows[i] |= bit
+
+    def border(self):
+        '''рамка дошки'''
+        self.hline(0)
+        self.hline(self.n - 1)
+        mask = 1 | (1 << (self.m - 1))
+        for i in range(1, self.n - 1):
+            self.rows[i] |= mask
+
+    def free(self, i):
+        '''маска прохідних клітинок рядка i (0 за межами дошки)'''
+        if 0 <= i < self.n:
+            return ~self.rows[i] & self.full
+        return 0
+
+    def neighbors(self, i):
+        '''(up, down, left, right) - маски рядка i: біт j, якщо сусід (i-1, j) / (i+1, j) /
+           (i, j-1) / (i, j+1) прохідний'''
+        f = self.free(i)
+        return self.free(i - 1), self.free(i + 1), (f << 1) & self.full, f >> 1
+
+    def cells(self, mask, i):
+        '''(i, j) для кожного біта j маски рядка i'''
+        j = 0
+        while mask:
+            if mask & 1:
+                yield i, j
+            mask >>= 1
+            j += 1
+
+    def free_cells(self):
+        '''усі прохідні клітинки (i, j) по рядках'''
+        for i in range(self.n):
+            yield from self.cells(self.free(i), i)
+
+    def __repr__(self):
+        return "Bitboard({}x{}, walls={})".format(self.n, self.m, len(self))
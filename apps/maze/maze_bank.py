@@ -0,0 +1,129 @@
+# ----------------------------------------------------------------
+# Банк лабіринтів: бітовий формат, читання лабіринта k без завантаження файла
+# ----------------------------------------------------------------
+# Maze bank: bit-packed mazes, maze k is read with one seek
+# ----------------------------------------------------------------
+# Released under the MIT license
+
+"""
+Замість генерації лабіринта на кожній ітерації (build_maze) або текстового
+файла з координатами (read_file) - готові лабіринти у бінарному файлі,
+які будує host/build_maze_bank.py (з перевіркою зв'язності):
+
+    bank = MazeBank('mazes.bin')
+    maze, start, finish = bank.load(random.randrange(len(bank)))
+
+Формат (little-endian):
+    заголовок 16 байт: b'MAZB', u8 версія, u8 0, u16 n, u16 m, u32 кількість, u16 0
+    запис лабіринта:   u8 i_start, u8 i_finish (рядки входу/виходу),
+                       n*m бітів стін: клітинка (i, j) -> біт k = i*m + j,
+                       байт k >> 3, біт k & 7 (молодший перший), 1 - стіна
+Вхід (i_start, 0) і вихід (i_finish, m-1) у бітах записані стіною - load()
+пробиває лише ті, що потрібні застосунку (start_en / finish_en).
+Запис для 16x16 - 34 байти; load(k) - один seek() + readinto() у буфер,
+виділений один раз.
+"""
+
+import struct
+from bitboard import Bitboard
+
+MAGIC = b'MAZB'
+VERSION = 1
+HEADER = '<4sBBHHIH'
+HEADER_SIZE = struct.calcsize(HEADER)    # 16
+
+
+def record_size(n, m):
+    return 2 + (n * m + 7) // 8
+
+
+def pack(grid, start, finish, n, m):
+    '''лабіринт (стіни (i, j) - Bitboard або множина, вхід, вихід) -> запис банку (bytearray)'''
+    rec = bytearray(record_size(n, m))
+    rec[0] = start[0]
+    rec[1] = finish[0]
+    for i, j in grid:
+        k = i * m + j
+        rec[2 + (k >> 3)] |= 1 << (k & 7)
+    for i, j in (start, finish):
+        k = i * m + j
+        rec[2 + (k >> 3)] |= 1 << (k & 7)
+    return rec
+
+
+def unpack(rec, n, m, start_en=True, finish_en=True):
+    '''запис банку -> (Bitboard стін, start, finish) як у build_maze()'''
+    grid = Bitboard(n, m)
+    rows = grid.rows
+    for i in range(n):
+        k = i * m
+        r = 0
+        for j in range(m):
+            if rec[2 + (k >> 3)] & (1 << (k & 7)):
+                r |= 1 << j
+            k += 1
+        rows[i] = r
+    start, finish = None, None
+    if start_en:
+        start = rec[0], 0
+        grid.discard(start)
+    if finish_en:
+        finish = rec[1], m-1
+        grid.discard(finish)
+    return grid, start, finish
+
+
+def write_bank(path, n, m, records):
+    '''records - послідовність записів pack(); вертає кількість'''
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(struct.pack(HEADER, MAGIC, VERSION, 0, n, m, 0, 0))
+        for rec in records:
+            f.write(rec)
+            count += 1
+        f.seek(0)
+        f.write(struct.pack(HEADER, MAGIC, VERSION, 0, n, m, count, 0))
+    return count
+
+
+class MazeBank:
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        magic, version, _, self.n, self.m, self.count, _ = \
+            struct.unpack(HEADER, self.file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError("{} is not a maze bank (v{})".format(path, VERSION))
+        self.size = record_size(self.n, self.m)
+        self.rec = bytearray(self.size)
+
+    def __len__(self):
+        return self.count
+
+    def read(self, k):
+        '''сирий запис лабіринта k (буфер перезаписується наступним read())'''
+        if not 0 <= k < self.count:
+            raise IndexError("maze {} of {}".format(k, self.count))
+        self.file.seek(HEADER_SIZE + k * self.size)
+        self.file.readinto(self.rec)
+        return self.rec
+
+    def load(self, k, start_en=True, finish_en=True):
+        '''лабіринт k: (Bitboard стін, start, finish) як у build_maze()'''
+        return unpack(self.read(k), self.n, self.m, start_en, finish_en)
+
+    def close(self):
+        self.file.close()
+
+
+def open_bank(path, n, m):
+    '''MazeBank або None, якщо файла немає (тоді застосунок генерує лабіринти сам)'''
+    try:
+        bank = MazeBank(path)
+    except OSError:
+        return None
+    if (bank.n, bank.m) != (n, m):
+        bank.close()
+        raise ValueError("{} holds {}x{} mazes, panel is {}x{}".format(path, bank.n, bank.m, n, m))
+    return bank
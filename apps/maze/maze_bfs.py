@@ -14,14 +14,18 @@
 import time, random
 import machine
 from neopixel import NeoPixel as np
+from np_utils import Compositor
+from panel import n, m, geo, coord_to_pix
+from frame_sched import FrameScheduler
 from graph import Graph
 import maze_generator
+import maze_bank
 
 
-n = 16       # number of row
-m = 16       # number of col
 neo_pin = 20 # pin number to the LEDs
-speed = 100  # LED switching delay
+fps = 10     # animation frame rate, frames/s
+MAZE_BANK = 'mazes.bin'   # банк лабіринтів (host/build_maze_bank.py); якщо файла немає - генерація
+MAZE_SEEDS = None         # напр. range(20): рівні-лабіринти по колу, повтори - з кешу (MazeCache)
 
 green = 0, 24, 0
 low_green = 0, 1, 0
@@ -39,13 +43,10 @@ brown = 18, 4, 0
 
 # creating an instance of a class NeoPixel
 pix = np(machine.Pin(neo_pin), n * m)
-
-def coord_to_pix(i, j):
-        '''
-        отримує координати матриці (row x col) row = i, col =  j
-        вертає neopixel-коефіцієнт LED-матриці
-        '''
-        return m * i + j if i % 2 else m-j-1 + m * i
+# шари кадру: стіни - статичний фон, точки/шлях - динамічний шар
+comp = Compositor(n, m, geo)
+# кадри за дедлайнами: рівно fps кроків/с незалежно від часу обчислень
+sched = FrameScheduler(fps)
 
 def read_file(name):
     '''Зчитує файл з координатами вершин x, y
@@ -65,23 +66,24 @@ def light_path(path):
     for a, b in path:
         if (a, b) not in visited:
             visited.add((b, a))
-            pix[a] = green
+            comp.set(a, green)
         else:
-            pix[a] = low_green
-        pix.write()
-        time.sleep_ms(speed)    
+            comp.set(a, low_green)
+        if sched.due():
+            comp.commit(pix)
 
 def write_path_neo(path, show_path=True):
+    sched.start()
     if show_path:
         light_path(path)
     else:
         for a, b in path:
-            pix[b] = green
-            pix[a] = nothing
-            pix.write()
-            time.sleep_ms(speed)
-    pix[path[-1][1]] = red
-    pix.write()
+            comp.put(b, green)
+            comp.clear(a)
+            if sched.due():
+                comp.commit(pix)
+    comp.set(path[-1][1], red)
+    comp.commit(pix)
     time.sleep_ms(400)
 
 
@@ -102,17 +104,17 @@ def main_run():
 
    # виводимо лабіринт
     for coord in maze:
-        pix[coord_to_pix(*coord)] = brown
-    pix.write()
+        comp.set_background(coord_to_pix(*coord), brown)
+    comp.commit(pix)
     
     # виводимо точки старта та фініша з випадковими координатами
     start_vertex = random.choice(list(vertices.keys()))
     temp_list = list(vertices.keys())[:]
     temp_list.remove(start_vertex)
     end_vertex = random.choice(temp_list)
-    pix[start_vertex] = green
-    pix[end_vertex] = blue
-    pix.write()
+    comp.set(start_vertex, green)
+    comp.set(end_vertex, blue)
+    comp.commit(pix)
     
     # створюємо примірник графа
     graph = Graph(vertices)
@@ -127,9 +129,8 @@ def main_run():
     
     
 def clear():
-    for i in range(len(pix)):
-        pix[i] = 0, 0, 0
-    pix.write()
+    comp.reset()
+    comp.commit(pix)
 
 
 if __name__ == '__main__':
@@ -142,14 +143,26 @@ if __name__ == '__main__':
     coord_end = (0, 10)
     maze = {(i, j) for i in range(n) for j in range(m) if coord_to_pix(i, j) not in vertices}
     '''
+    bank = maze_bank.open_bank(MAZE_BANK, n, m)
+    mazes = maze_generator.MazeCache(8, pix=coord_to_pix)
+    level = 0
     while True:
-        # створюємо лабіринт
-        maze, *_ = maze_generator.build_maze(num_random_hole=8, start_en=False, finish_en=False)
+        # створюємо лабіринт (або беремо готовий з банку)
+        vertices = None
+        if bank:
+            maze, *_ = bank.load(random.randrange(len(bank)), start_en=False, finish_en=False)
+        elif MAZE_SEEDS:
+            seed = MAZE_SEEDS[level % len(MAZE_SEEDS)]
+            level += 1
+            maze, _, _, vertices = mazes.get(seed, n, m, num_random_hole=8, start_en=False, finish_en=False)
+        else:
+            maze, *_ = maze_generator.build_maze(num_random_hole=8, start_en=False, finish_en=False)
         # якщо без лабіринта (типу шукає в темній кімнаті кішку) 
         # maze, coord_start, coord_end = maze_generator.build_border(n, m)
         
-        # вершини - решта точок, які не в лабіринті
-        vertices = {coord_to_pix(i, j): (i, j) for i in range(n) for j in range(m) if (i, j) not in maze}
+        # вершини - решта точок, які не в лабіринті (прохідні біти Bitboard)
+        if vertices is None:
+            vertices = {coord_to_pix(i, j): (i, j) for i, j in maze.free_cells()}
         clear()
         main_run()
     
\ No newline at end of file
@@ -18,14 +18,18 @@
 import machine
 import time, random
 from neopixel import NeoPixel as np
+from np_utils import Compositor
+from panel import n, m, geo, coord_to_pix
+from frame_sched import FrameScheduler
 from graph import Graph
 import maze_generator
+import maze_bank
 
 
-n = 16         # number of row
-m = 16         # number of col
 neo_pin = 20   # pin number to the LEDs
-speed = 40     # LED switching delay
+fps = 25       # animation frame rate, frames/s
+MAZE_BANK = 'mazes.bin' # банк лабіринтів (host/build_maze_bank.py); якщо файла немає - генерація
+MAZE_SEEDS = None       # напр. range(20): рівні-лабіринти по колу, повтори - з кешу (MazeCache)
 num_cycle = 8  # number of cyclic repeat of route
 # timer time (mc), after which the range of random paths selection changes
 # to avoid cyclicality:
@@ -53,15 +57,12 @@ color_2 = green  # the point that catches up
 
 # creating an instance of a class NeoPixel
 pix = np(machine.Pin(neo_pin), n * m)
+# шари кадру: стіни - статичний фон, точки/шлях - динамічний шар
+comp = Compositor(n, m, geo)
+# кадри за дедлайнами: рівно fps кроків/с, пошук шляху між кроками входить у період
+sched = FrameScheduler(fps)
 
 
-def coord_to_pix(i, j):
-        '''
-        отримує координати матриці (row x col) row = i, col =  j
-        вертає neopixel-коефіцієнт LED-матриці
-        '''
-        return m * i + j if i % 2 else m-j-1 + m * i
-
 def read_file(name):
     '''Зчитує файл з координатами вершин x, y
        вертає словник вершин:
@@ -79,23 +80,21 @@ def write_neo(path_1, path_2):
     for edge_1, edge_2 in zip(path_1, path_2):
         a, b = edge_1
         c, d = edge_2
-        pix[b] = color_1
-        pix[a] = nothing
-        pix[d] = color_2
-        pix[c] = nothing
-        pix.write()
+        # агент покидає клітинку - під ним знову видно фон або іншого агента
+        comp.move(a, b, color_1)
+        comp.move(c, d, color_2)
         if b == d:
+            comp.commit(pix)
             return b, b
-        time.sleep_ms(speed)
+        if sched.due():
+            comp.commit(pix)
     return b, d
 
 def write_one_neo(path, color):
     for a, b in path:
-        pix[b] = color
-        if pix[a] == color:
-            pix[a] = nothing
-        pix.write()
-        time.sleep_ms(speed)
+        comp.move(a, b, color)
+        if sched.due():
+            comp.commit(pix)
     return b
 
 def find_path(graph, start, path_2):
@@ -144,8 +143,8 @@ def write_path(graph, start_1, start_2):
         else:  # if path_2 == []
             path_1 = find_path(graph, start_1, path_2_prev)
             if not path_1: # if path_2 == [] and path_1 == []
-                pix[start_1] = nothing
-                pix.write()
+                comp.take(start_1, color_1)
+                comp.commit(pix)
                 start_1 = start_2
             else:
                 start_1 = write_one_neo(path_1, color_1)
@@ -165,25 +164,25 @@ def main_run():
     
    # виводимо лабіринт
     for coord in maze:
-        pix[coord_to_pix(*coord)] = brown
-    pix.write()
+        comp.set_background(coord_to_pix(*coord), brown)
+    comp.commit(pix)
     
     # виводимо точки старта
-    pix[start_1] = color_1
+    comp.put(start_1, color_1)
     start_2 = random.choice(list(vertices.keys()))
-    pix[start_2] = color_2
-    pix.write()
+    comp.put(start_2, color_2)
+    comp.commit(pix)
     
     # створюємо примірник графа
     graph = Graph(vertices)
 
+    sched.start()
     write_path(graph, start_1, start_2)
 
 
 def clear():
-    for i in range(len(pix)):
-        pix[i] = 0, 0, 0
-    pix.write()
+    comp.reset()
+    comp.commit(pix)
 
 
 def f_timer_1(t):
@@ -209,15 +208,27 @@ if __name__ == '__main__':
     max_time = 0
     tim_1 = machine.Timer()
     tim_2 = machine.Timer()
+    bank = maze_bank.open_bank(MAZE_BANK, n, m)
+    mazes = maze_generator.MazeCache(8, pix=coord_to_pix)
+    level = 0
     while True:
         
-        # створюємо лабіринт
-        maze, coord_start, coord_end = maze_generator.build_maze(num_random_hole=8, finish_en=False)
+        # створюємо лабіринт (або беремо готовий з банку)
+        vertices = None
+        if bank:
+            maze, coord_start, coord_end = bank.load(random.randrange(len(bank)), finish_en=False)
+        elif MAZE_SEEDS:
+            seed = MAZE_SEEDS[level % len(MAZE_SEEDS)]
+            level += 1
+            maze, coord_start, coord_end, vertices = mazes.get(seed, n, m, num_random_hole=8, finish_en=False)
+        else:
+            maze, coord_start, coord_end = maze_generator.build_maze(num_random_hole=8, finish_en=False)
         # якщо без лабіринта (типу шукає в темній кімнаті кішку) 
         # maze, coord_start, coord_end = maze_generator.build_border(n, m)
          
-        # вершини - решта точок, які не в лабіринті
-        vertices = {coord_to_pix(i, j): (i, j) for i in range(n) for j in range(m) if (i, j) not in maze}
+        # вершини - решта точок, які не в лабіринті (прохідні біти Bitboard)
+        if vertices is None:
+            vertices = {coord_to_pix(i, j): (i, j) for i, j in maze.free_cells()}
         clear()
         flag_exit = False
         
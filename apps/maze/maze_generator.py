@@ -17,6 +17,12 @@
   - build_grid() — помилка для прямокутної матриці (було n == m)
   - змінено random_sample()
   - graph = Graph(components, edges) виправлено на graph = Graph(components, set(edges))
+  - build_edges(): замість перебору всіх пар компонент (combinations + find_neighbor,
+    O(K² · |comp|²)) - карта міток компонент і один прохід по клітинках стін, O(n·m)
+  - стіни - Bitboard (bitboard.py, один int на рядок) замість множини кортежів (i, j);
+    протокол множини (in, iter, remove) збережено, лінії сітки малюються цілими рядками
+  - build_maze(seed=...) - власний генератор Rng (xorshift32) замість глобального random:
+    seed + параметри повністю задають лабіринт; MazeCache - LRU готових лабіринтів
 
 Деякі роз'яснення щодо способу побудови лабіринта
 1. Будуються стіни як суцільні горизонтальні та вертикальні лінії (плюс рамка),
@@ -37,7 +43,10 @@
    Ключове: для будь-яких двох “сусідніх кімнат” між ними є стіна товщиною 1,
    отже існують дві прохідні клітинки по різні боки стіни на відстані dist==4
    (або dist==2 для кутового випадку),
-   і тому функції build_edges / find_neighbor таке ребро знайдуть.
+   і тому функція build_edges таке ребро знайде.
+   Обидві клітинки пари - сусіди однієї клітинки стіни w (зверху/знизу, ліворуч/праворуч,
+   або одна по вертикалі й одна по горизонталі для dist==2), тож build_edges мітить
+   прохідні клітинки номерами компонент (label_cells) і перебирає лише клітинки стін.
    Тому граф компонент буде зв’язаним (один компонент зв'язності).
 6. Будуємо остовне дерево
     path = graph.dfs_tree(0)
@@ -55,8 +64,10 @@
      розділені стіною, мають пару вершин по різні боки стіни, між якими:
      dist == 4 (через одну клітинку по горизонталі/вертикалі), або
      dist == 2 (діагональний дотик “кутами”, якщо це враховується).
-   2) Функції build_edges/find_neighbor додають ребро між компонентами,
-      якщо існує хоча б одна така пара вершин з dist ∈ {2,4}.
+   2) Функція build_edges додає ребро між компонентами,
+      якщо існує хоча б одна така пара вершин з dist ∈ {2,4}
+      (будь-яка така пара має спільного сусіда-стіну: при dist==4 це середня клітинка,
+      при dist==2 обидві кутові клітинки - стіни, інакше компонента була б одна).
    3) “Пробиття отворів” (видалення стін) лише об’єднує компоненти
       і не може зробити граф незв’язним (це еквівалент “контракції” у зв’язному графі).
 
@@ -67,48 +78,99 @@
 Зауваження:
 Якщо змінювати генератор (товщина стін, правила сусідства/пробиття),
 ці умови треба перевірити заново.
+
+Режим build_maze(algorithm='kruskal') - без проміжних графів (п.3-7):
+   - прохідні клітинки (після п.1-2) об'єднуються в області UnionFind
+     (елемент - індекс клітинки i*m + j), сусідні по 4-напрямках - в одну область;
+   - кандидати - внутрішні клітинки стін, що мають щонайменше двох прохідних сусідів;
+     їх список перемішується один раз;
+   - клітинка стіни пробивається лише тоді, коли її прохідні сусіди належать
+     різним областям (тоді всі вони об'єднуються), інакше залишається.
+   Зв'язність: дві сусідні “кімнати” розділені клітинкою стіни w, у якої обидві
+   кімнати - прохідні сусіди (з протилежних боків), тож w - кандидат. Якщо, коли
+   черга дійде до w, кімнати ще в різних областях, w пробивається; отже після
+   проходу всі сусідні кімнати в одній області, а граф “кімнат” зв'язний (п.5) ⇒
+   лабіринт зв'язний. Пробивається лише стіна, що з'єднує різні області, тож
+   нових циклів (крім утворених випадковими дірками п.2) немає, як і з остовним деревом.
 """
 
 import random
+import machine
+from array import array
+from collections import OrderedDict
 from neopixel import NeoPixel as np
 from graph import Graph
-from itertools import combinations
+from geometry import Geometry
+from panel import n, m, geo, coord_to_pix
+from bitboard import Bitboard, popcount
+from utils.graph_utils import UnionFind
 
 
-n = 16        # number of row
-m = 16        # number of col
 neo_pin = 20  # pin to LED matrix
 
 brown = 20, 4, 0
 green = 0, 24, 0
 nothing = 0, 0, 0
 
-def coord_to_pix(i, j):
-        '''
-        отримує координати матриці (row x col) row = i, col = j
-        вертає neopixel-індекс LED-матриці
-        '''
-        return m * i + j if i % 2 else m-j-1 + m * i
+_geos = {(n, m): geo}
+
+def pix_map(n, m):
+    '''(i, j) -> індекс LED для матриці-серпантину n x m (Geometry на кожен розмір - один раз)'''
+    g = _geos.get((n, m))
+    if g is None:
+        g = _geos[(n, m)] = Geometry(n, m)
+    return g.pix
+
+
+class Rng:
+    '''
+    Власний стан випадкових чисел (xorshift32): лабіринт з тим самим seed
+    однаковий незалежно від інших викликів random у застосунку.
+    Має randint(a, b), як модуль random, тож функції генератора приймають
+    rng=random (глобальний стан) або rng=Rng(seed).
+    '''
+
+    def __init__(self, seed):
+        # розмішуємо seed, щоб сусідні seed давали різні послідовності; стан != 0
+        self.state = ((seed * 0x9E3779B1) ^ 0x6A09E667) & 0xFFFFFFFF or 1
+
+    def next(self):
+        x = self.state
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        self.state = x
+        return x
+
+    def randint(self, a, b):
+        '''рівномірно a..b включно (без зсуву: відкидання хвоста діапазону)'''
+        span = b - a + 1
+        limit = 0x100000000 - 0x100000000 % span
+        x = self.next()
+        while x >= limit:
+            x = self.next()
+        return a + x % span
 
-def build_grid(n, m):
-    grid = []
+
+def build_grid(n, m, rng=random):
+    grid = Bitboard(n, m)
     # build horizontal lines
-    num = random.randint(1, n-3)
+    num = rng.randint(1, n-3)
     for i in range(0, n, 2):
         ind_i = i + 1 if i > num else i
-        for j in range(m):
-            grid.append((ind_i, j))
+        if ind_i < n:
+            grid.hline(ind_i)
     # build vertical lines
-    num = random.randint(1, m-3)
+    num = rng.randint(1, m-3)
     for j in range(0, m, 2):
         ind_j = j + 1 if j > num else j
-        for i in range(n):
-            grid.append((i, ind_j))
+        if ind_j < m:
+            grid.vline(ind_j)
     
-    return set(grid)
+    return grid
 
 
-def random_sample(max_index, k):
+def random_sample(max_index, k, rng=random):
     """
     Повертає k унікальних випадкових чисел у діапазоні [0 .. max_index].
     """
@@ -119,51 +181,98 @@ def random_sample(max_index, k):
 
     picked = set()
     while len(picked) < k:
-        picked.add(random.randint(0, max_index))
+        picked.add(rng.randint(0, max_index))
     return list(picked)
 
 
-def build_wall(n, m, num_random_hole):
-    '''вертає множину випадкових координат на площині розміром n x m
+def shuffle(items, rng=random):
+    '''перемішує список на місці (Фішер-Єйтс; у random MicroPython немає shuffle)'''
+    for i in range(len(items) - 1, 0, -1):
+        k = rng.randint(0, i)
+        items[i], items[k] = items[k], items[i]
+
+
+def build_wall(n, m, num_random_hole, rng=random):
+    '''вертає Bitboard стін на площині розміром n x m
        метод отримання:
          - наноситься сітка через клітинку
-         - в сітці робляться випадково отвори
+         - в сітці робляться випадково отвори (лише у внутрішніх клітинках,
+           контур площини залишається)
          - кількість отворів задається параметром num_random_hole
-         - додається контур площини
     '''
-    grid = build_grid(n, m)
-    border = set()
-    grid_internal = [(i, j) for i, j in grid if (i != 0 and i != n-1 and j != 0 and j != m-1) \
-                     or border.add((i, j))]
-    random_index = random_sample(len(grid_internal), num_random_hole)
-    grid_internal = {grid_internal[i] for i in range(len(grid_internal)) if i not in random_index}
-    grid = border.union(grid_internal)
+    grid = build_grid(n, m, rng)
+    inner = grid.full & ~1 & ~(1 << (m-1))
+    count = 0
+    for i in range(1, n-1):
+        count += popcount(grid.rows[i] & inner)
+    holes = set(random_sample(count - 1, num_random_hole, rng))
+    k = 0
+    for i in range(1, n-1):
+        for cell in grid.cells(grid.rows[i] & inner, i):
+            if k in holes:
+                grid.discard(cell)
+            k += 1
     return grid
 
-def find_neighbor(comp_1, comp_2, vertices):
-    
-    '''comp_1, comp_2 - компоненти вершин (множина, список, tuple, iter)
-       Вертає першу (при переборі) пару вершин, які є сусідніми
-       Якщо таких немає, то вертає None
-       сусідні вершини - коли відстань між ними == 2 або 4
-       відстань з координатами визначаємо: (x1-x2)**2 + (y1-y2)**2, тобто без кореня
+def label_cells(components, vertices, n, m):
+    '''карта міток у плоских масивах (клітинка (i, j) -> індекс i*m + j):
+       label[k] - номер компоненти + 1 (0 - стіна), cell[k] - вершина клітинки
+       вертає (label, cell, keys), keys[label - 1] - ключ компоненти у components
     '''
-    for u in comp_1:
-        x1, y1 = vertices[u]
-        for v in comp_2:
-            x2, y2 = vertices[v]
-            dist = (x1-x2)**2 + (y1-y2)**2
-            if dist == 2 or dist == 4:
-                return u, v
-        
-def build_edges(components, vertices):
-    '''вертає множину ребер між компонентами графа
+    label = array('i', bytes(4 * n * m))
+    cell = [None] * (n * m)
+    keys = list(components)
+    for num, key in enumerate(keys, 1):
+        for v in components[key]:
+            i, j = vertices[v]
+            label[i * m + j] = num
+            cell[i * m + j] = v
+    return label, cell, keys
+
+
+def _link(edges, keys, a, b, u, v):
+    # одна пара (u, v) на пару сусідніх компонент; u - з компоненти a
+    a = keys[a - 1]
+    b = keys[b - 1]
+    if (a, b) not in edges and (b, a) not in edges:
+        edges[(a, b)] = u, v
+
+
+def build_edges(components, vertices, n, m):
+    '''вертає словник ребер між компонентами графа {(a, b): (u, v)}
+       u з компоненти a, v з компоненти b - сусідні вершини (dist == 2 або 4)
+       Кожна клітинка стіни w переглядається один раз: сусіди w з різних компонент
+         - зверху й знизу або ліворуч і праворуч (dist == 4, пробивається w);
+         - зверху/знизу (u) і ліворуч/праворуч (v) (dist == 2, break_wall пробиває
+           клітинку під/над u, тобто w)
+       Час - O(n*m) замість перебору всіх пар компонент
     '''
+    label, cell, keys = label_cells(components, vertices, n, m)
     edges = {}
-    for a, b in combinations(components, 2):
-        edge = find_neighbor(components[a], components[b], vertices)
-        if edge:
-            edges[(a, b)] = edge
+    for i in range(n):
+        row = i * m
+        for j in range(m):
+            k = row + j
+            if label[k]:
+                continue
+            up = label[k - m] if i > 0 else 0
+            down = label[k + m] if i < n - 1 else 0
+            left = label[k - 1] if j > 0 else 0
+            right = label[k + 1] if j < m - 1 else 0
+            if up and down and up != down:
+                _link(edges, keys, up, down, cell[k - m], cell[k + m])
+            if left and right and left != right:
+                _link(edges, keys, left, right, cell[k - 1], cell[k + 1])
+            if up:
+                if left and left != up:
+                    _link(edges, keys, up, left, cell[k - m], cell[k - 1])
+                if right and right != up:
+                    _link(edges, keys, up, right, cell[k - m], cell[k + 1])
+            if down:
+                if left and left != down:
+                    _link(edges, keys, down, left, cell[k + m], cell[k - 1])
+                if right and right != down:
+                    _link(edges, keys, down, right, cell[k + m], cell[k + 1])
     return edges
     
 def break_wall(path, grid, edges, vertices):
@@ -187,49 +296,117 @@ def break_wall(path, grid, edges, vertices):
         if (x, y) in grid:
             grid.remove((x, y))
      
-def create_start_finish(grid, start_en=True, finish_en=True):
+def kruskal_walls(grid, n, m, rng=random):
+    '''пробиває перегородки в grid (алгоритм Краскала на UnionFind):
+       кандидати - внутрішні клітинки стін з двома і більше прохідними сусідами,
+       у випадковому порядку; клітинка пробивається, якщо з'єднує різні області
+       вертає кількість пробитих клітинок
+    '''
+    rows = grid.rows
+    inner = grid.full & ~1 & ~(1 << (m-1))
+    regions = UnionFind()
+    candidates = []
+    for i in range(n):
+        up, down, left, right = grid.neighbors(i)
+        if 0 < i < n-1:
+            # стіни з двома і більше прохідними сусідами - маскою на весь рядок
+            two = (up & (down | left | right)) | (down & (left | right)) | (left & right)
+            for _, j in grid.cells(rows[i] & inner & two, i):
+                candidates.append(i * m + j)
+        for _, j in grid.cells(grid.free(i), i):
+            k = i * m + j
+            regions.add(k)
+            if (up >> j) & 1:
+                regions.union(k, k - m)
+            if (left >> j) & 1:
+                regions.union(k, k - 1)
+    shuffle(candidates, rng)
+    find = regions.find
+    count = 0
+    for k in candidates:
+        i, j = divmod(k, m)
+        near = []
+        if not (rows[i-1] >> j) & 1:
+            near.append(k - m)
+        if not (rows[i+1] >> j) & 1:
+            near.append(k + m)
+        if not (rows[i] >> (j-1)) & 1:
+            near.append(k - 1)
+        if not (rows[i] >> (j+1)) & 1:
+            near.append(k + 1)
+        root = find(near[0])
+        for x in near:
+            if find(x) != root:
+                grid.clear(i, j)
+                regions.add(k)
+                for x in near:
+                    regions.union(k, x)
+                count += 1
+                break
+    return count
+
+def create_start_finish(grid, start_en=True, finish_en=True, n=n, m=m, rng=random):
     '''Створює вхід та вихід з лабіринта
        вхід - ліворуч, вихід - праворуч
     '''
     start, finish = None, None
     if start_en:
-        i = random.randint(1, n-2)
+        i = rng.randint(1, n-2)
         while (i, 1) in grid:
-            i = random.randint(1, n-2)
+            i = rng.randint(1, n-2)
         start = i, 0
         grid.remove(start)
     
     if finish_en:
-        i = random.randint(1, n-2)
+        i = rng.randint(1, n-2)
         while (i, m-2) in grid:
-            i = random.randint(1, n-2)
+            i = rng.randint(1, n-2)
         finish = i, m-1
         grid.remove(finish)
         
     return start, finish
 
 
-def build_border(n, m):
-    '''вертає множину координат прямокутника (n x m)
+def build_border(n, m, rng=random):
+    '''вертає Bitboard прямокутника (n x m)
        та координати випадкових точок на лівій і правій стороні
        Створено для перевірки роботи на порожньому лабіринті 
     '''
-    border = {(i, j) for i in (0, n-1) for j in range(m)}
-    border.update({(i, j) for i in range(1, n-1) for j in (0, m-1)})
-    i_start = random.randint(1, n-2)
-    i_finish = random.randint(1, n-2)
-    j_finish = random.randint(1, m-2)
+    border = Bitboard(n, m)
+    border.border()
+    i_start = rng.randint(1, n-2)
+    i_finish = rng.randint(1, n-2)
+    j_finish = rng.randint(1, m-2)
     border.remove((i_start, 0))
     return border, (i_start, 0), (i_finish, j_finish)
 
-def build_maze(n=16, m=16, num_random_hole=30, start_en=True, finish_en=True):
+def build_maze(n=n, m=m, num_random_hole=30, start_en=True, finish_en=True, algorithm='graph',
+               seed=None):
+    '''algorithm:
+         'graph'   - граф вершин -> компоненти -> граф компонент -> dfs_tree -> break_wall
+         'kruskal' - один прохід kruskal_walls() по клітинках стін, без графів
+                     (менше часу і пам'яті, лабіринт будь-якого розміру)
+       seed - None: глобальний random; число: власний Rng(seed), лабіринт повністю
+              визначається seed і параметрами
+    '''
+    if algorithm not in ('graph', 'kruskal'):
+        raise ValueError("unknown maze algorithm: {}".format(algorithm))
+    rng = random if seed is None else Rng(seed)
     # створюємо заготовку лабіринта
-    grid = build_wall(n, m, num_random_hole)
+    grid = build_wall(n, m, num_random_hole, rng)
+    
+    if algorithm == 'kruskal':
+        kruskal_walls(grid, n, m, rng)
+        start, finish = None, None
+        if start_en or finish_en:
+            start, finish = create_start_finish(grid, start_en, finish_en, n, m, rng)
+        return grid, start, finish
     
     # Будуємо граф з точoк, що не увійшли до стіни лабіринту
     # Створюємо словник вершин:
     # {vertex1: (x1, y1), vertex2: (x2, y2), ...}
-    vertices = {coord_to_pix(i, j): (i, j) for i in range(n) for j in range(m) if (i, j) not in grid}
+    pix = pix_map(n, m)
+    vertices = {pix(i, j): (i, j) for i, j in grid.free_cells()}
     graph = Graph(vertices)
     
     # знаходимо компоненти зв'язності графа
@@ -239,7 +416,7 @@ def build_maze(n=16, m=16, num_random_hole=30, start_en=True, finish_en=True):
     # вершини - компоненти
     # ребра - коли відстань між компонентами = 2 (коли якісь вершини торкаються кутами),
     #        або = 4, коли вершини розміщені через клітинку 
-    edges = build_edges(components, vertices)
+    edges = build_edges(components, vertices, n, m)
     graph = Graph(components, set(edges))
         
     # будуємо остовне дерево
@@ -251,9 +428,61 @@ def build_maze(n=16, m=16, num_random_hole=30, start_en=True, finish_en=True):
     # Створюємо вхід та вихід з лабіринта
     start, finish = None, None
     if start_en or finish_en:
-        start, finish = create_start_finish(grid, start_en, finish_en)
+        start, finish = create_start_finish(grid, start_en, finish_en, n, m, rng)
     
     return grid, start, finish
+
+
+class MazeCache:
+    '''
+    LRU готових лабіринтів з таблицями вершин: повторний рівень (той самий seed)
+    не генерується заново.
+        mazes = MazeCache(8, pix=coord_to_pix)
+        maze, start, finish, vertices = mazes.get(seed, n, m, num_random_hole)
+    Ключ - (seed, n, m, num_random_hole) та решта параметрів build_maze
+    (start_en, finish_en, algorithm), бо вони теж змінюють лабіринт.
+    vertices = {pix(i, j): (i, j)} для прохідних клітинок; pix - геометрія панелі
+    застосунку (для лабіринтів її розміру), None - pix_map(n, m) для кожного розміру.
+    Лабіринт і вершини спільні для всіх get() з тим самим ключем - не змінювати.
+    seed=None - щоразу новий лабіринт з глобального random: будується без кешу.
+    '''
+
+    def __init__(self, size=8, pix=None):
+        self.size = size
+        self.pix = pix
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, seed, n=n, m=m, num_random_hole=30, start_en=True, finish_en=True, algorithm='graph'):
+        if seed is None:
+            # ключ None повертав би перший випадковий лабіринт замість нового
+            self.misses += 1
+            return self._build(seed, n, m, num_random_hole, start_en, finish_en, algorithm)
+        key = (seed, n, m, num_random_hole, start_en, finish_en, algorithm)
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            entry = self._build(seed, n, m, num_random_hole, start_en, finish_en, algorithm)
+            if len(self.entries) >= self.size:
+                # найдавніше використаний - перший у порядку вставки
+                self.entries.pop(next(iter(self.entries)))
+        else:
+            self.hits += 1
+        self.entries[key] = entry
+        return entry
+
+    def _build(self, seed, n, m, num_random_hole, start_en, finish_en, algorithm):
+        grid, start, finish = build_maze(n, m, num_random_hole, start_en, finish_en, algorithm, seed)
+        pix = self.pix or pix_map(n, m)
+        vertices = {pix(i, j): (i, j) for i, j in grid.free_cells()}
+        return grid, start, finish, vertices
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
     
     
 
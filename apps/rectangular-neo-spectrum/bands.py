@@ -0,0 +1,195 @@
+# bands.py
+# Агрегація енергій FFT-бінів у частотні смуги та dBFS смуг
+# Released under the MIT license
+"""
+BandEngine - рахує dBFS усіх смуг спектра за один прохід по бінах:
+
+    bands = BandEngine(IND_BANDS, FS_RMS2, bias=...)
+    band_spectr = bands.compute(spectr)     # список NUM_BAND значень (dB)
+    band_q8 = bands.compute_q8(spectr)      # те саме в цілих 1/256 dB, без алокацій
+
+- межі смуг (IND_BANDS) переводяться в таблицю starts один раз;
+- енергії смуги сумуються цілими числами прямо з бітів float32: мантиси
+  бінів вирівнюються за найбільшим порядком у смузі, без проміжних float;
+  сума має вміститися в знакове 32-бітне ціле viper: 24 біти мантиси +
+  до SUM_CARRY_BITS = 7 бітів переносу (смуга до 128 бінів); для ширших
+  смуг мантиси заздалегідь зсуваються на shift[b] = ceil(log2(ширина)) - 7
+  бітів (втрачаються лише молодші біти, похибка dB не змінюється помітно);
+- логарифм: ціле log2 суми (старший біт + 6 наступних бітів через таблицю),
+  результат у Q8; похибка < 0.04 dB, без math.log10 на смугу;
+- на RP2040 обидва кроки - одна @micropython.viper функція (ptr32 на спектр),
+  тож compute_q8() не створює жодного float-об'єкта; на ПК - той самий
+  алгоритм на чистому Python, тож числа збігаються з платою.
+"""
+
+import math
+from array import array
+
+LOG2_BITS = 6                       # старші біти мантиси для таблиці
+SUM_CARRY_BITS = 7                  # біти переносу суми 24-бітних мантис у 31 біт
+DB_FLOOR = -120                     # dBFS для смуги з нульовою енергією
+DB_PER_Q8 = 10.0 * math.log10(2.0) / 256   # dB на одиницю log2 у Q8
+NO_ENERGY = -0x7FFF                 # log2q смуги без енергії
+# dB у Q8 (1/256 dB) з log2q: db_q8 = (log2q * DB_Q8_MUL) >> 10
+DB_Q8_MUL = int(DB_PER_Q8 * 256 * 1024 + 0.5)
+
+# log2(1 + (i + 0.5) / 64) у Q8: значення в середині інтервалу мантиси
+LOG2_FRAC = array('H', (int(256 * math.log2(1 + (i + 0.5) / (1 << LOG2_BITS)) + 0.5)
+                        for i in range(1 << LOG2_BITS)))
+
+try:
+    import micropython
+
+    @micropython.viper
+    def _band_log2q(spec, starts, shift, out, frac):
+        bits = ptr32(spec)
+        st = ptr16(starts)
+        g8 = ptr8(shift)
+        q = ptr32(out)
+        t = ptr16(frac)
+        n = int(len(out))
+        for b in range(n):
+            lo = int(st[b])
+            hi = int(st[b + 1])
+            # найбільший порядок у смузі (0, -0, від'ємні, денормалізовані - без енергії)
+            emax = 0
+            for k in range(lo, hi):
+                x = int(bits[k])
+                if x > 0:
+                    e = (x >> 23) & 0xFF
+                    if e > emax:
+                        emax = e
+            if emax == 0:
+                q[b] = -0x7FFF
+                continue
+            g = int(g8[b])
+            s = 0
+            for k in range(lo, hi):
+                x = int(bits[k])
+                if x > 0:
+                    sh = emax - ((x >> 23) & 0xFF) + g
+                    if sh < 24:
+                        s += ((x & 0x7FFFFF) | 0x800000) >> sh
+            p = 23 - g
+            while s >> (p + 1):
+                p += 1
+            # сума = s * 2**(emax - 127 - 23 + g), старший біт s - p
+            q[b] = ((emax - 150 + g + p) << 8) + t[(s >> (p - 6)) & 0x3F]
+
+    @micropython.viper
+    def _db_q8(log2q, n: int, bias, floor, out):
+        q = ptr32(log2q)
+        bs = ptr32(bias)
+        fl = ptr32(floor)
+        o = ptr32(out)
+        for b in range(n):
+            v = q[b]
+            if v == -0x7FFF:
+                o[b] = fl[b]
+            else:
+                o[b] = ((v * 3083) >> 10) + bs[b]      # 3083 = DB_Q8_MUL
+
+    def _float_bits(spec):
+        return spec
+
+except ImportError:
+    # CPython (host/emu.py): ті самі операції без viper
+    def _band_log2q(bits, starts, shift, out, frac):
+        for b in range(len(out)):
+            lo = starts[b]
+            hi = starts[b + 1]
+            emax = 0
+            for k in range(lo, hi):
+                x = bits[k]
+                if x and not x & 0x80000000:
+                    e = (x >> 23) & 0xFF
+                    if e > emax:
+                        emax = e
+            if emax == 0:
+                out[b] = NO_ENERGY
+                continue
+            g = shift[b]
+            s = 0
+            for k in range(lo, hi):
+                x = bits[k]
+                if x and not x & 0x80000000:
+                    sh = emax - ((x >> 23) & 0xFF) + g
+                    if sh < 24:
+                        s += ((x & 0x7FFFFF) | 0x800000) >> sh
+            # на платі s - знакове 32-бітне ціле viper: переповнення там зациклює Core0
+            if s >> 31:
+                raise OverflowError("band {} sum exceeds 31 bits".format(b))
+            p = 23 - g
+            while s >> (p + 1):
+                p += 1
+            out[b] = ((emax - 150 + g + p) << 8) + frac[(s >> (p - LOG2_BITS)) & 0x3F]
+
+    def _db_q8(log2q, n, bias, floor, out):
+        for b in range(n):
+            v = log2q[b]
+            out[b] = floor[b] if v == NO_ENERGY else ((v * DB_Q8_MUL) >> 10) + bias[b]
+
+    def _float_bits(spec):
+        # біти float32 без копіювання (на платі те саме робить ptr32 у viper)
+        return memoryview(spec).cast('B').cast('I')
+
+
+class BandEngine:
+
+    def __init__(self, ind_bands, ref_power, bias=None, start=1):
+        '''
+        ind_bands - кількість бінів у кожній смузі (IND_BANDS), смуги йдуть
+                    поспіль від біна start (бін 0 - постійна складова)
+        ref_power - потужність, що відповідає 0 dBFS (FS_RMS2)
+        bias      - dB, що додаються до кожної смуги (підсилення + поріг шуму)
+        '''
+        self.num = len(ind_bands)
+        self.lo = start
+        self.hi = start + sum(ind_bands)
+        # межі смуг: смуга b - біни starts[b] .. starts[b + 1] - 1
+        self.starts = array('H', bytes(2 * (self.num + 1)))
+        k = start
+        for b, w in enumerate(ind_bands):
+            self.starts[b] = k
+            k += w
+        self.starts[self.num] = k
+        # зсув мантис для широких смуг: ширина * 2**(24 - shift) < 2**31
+        self.shift = bytearray(self.num)
+        for b, w in enumerate(ind_bands):
+            g = 0
+            while w > 1 << (SUM_CARRY_BITS + g):
+                g += 1
+            self.shift[b] = g
+        self.q8 = array('i', bytes(4 * self.num))
+        # 10*log10(2 * e / ref) = DB_PER_Q8 * log2q(e) + 10*log10(2 / ref)
+        offset = 10.0 * math.log10(2.0 / ref_power)
+        bias = bias or (0,) * self.num
+        self.bias = [offset + bias[b] for b in range(self.num)]
+        self.floor = [DB_FLOOR + bias[b] for b in range(self.num)]
+        self.db = [0.0] * self.num
+        # ті самі зсуви в Q8 для compute_q8()
+        self.bias_q8 = array('i', (round(256 * v) for v in self.bias))
+        self.floor_q8 = array('i', (round(256 * v) for v in self.floor))
+        self.db_q8 = array('i', bytes(4 * self.num))
+
+    def _log2q(self, spec):
+        _band_log2q(_float_bits(spec), self.starts, self.shift, self.q8, LOG2_FRAC)
+        return self.q8
+
+    def compute(self, spec):
+        '''spec - енергії бінів (memoryview від fastfft); вертає self.db'''
+        q8 = self._log2q(spec)
+        db = self.db
+        bias = self.bias
+        for b in range(self.num):
+            q = q8[b]
+            db[b] = self.floor[b] if q == NO_ENERGY else DB_PER_Q8 * q + bias[b]
+        return db
+
+    def compute_q8(self, spec):
+        '''
+        те саме, що compute(), у цілих 1/256 dB (array('i') self.db_q8);
+        без float-об'єктів - для Core1 без пауз на gc
+        '''
+        _db_q8(self._log2q(spec), self.num, self.bias_q8, self.floor_q8, self.db_q8)
+        return self.db_q8
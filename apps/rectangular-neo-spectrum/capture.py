@@ -0,0 +1,69 @@
+# capture.py
+# Конвеєрний захват ADC: наступний DMA-захват іде, поки рахується FFT
+# Released under the MIT license
+"""
+Подвійний буфер семплів поверх adc_dma (start/busy/buffer_i16/close):
+
+    cap = Capture(ADC0, SAMPLE_FREQ, FFT_SIZE)
+    while True:
+        buf = cap.get()                  # готовий кадр i16 (буфер A або B)
+        spectr = fastfft.rfft(buf, True) # тим часом DMA заповнює наступний кадр
+
+get() чекає кінця поточного захвату, копіює семпли в один з двох
+заздалегідь виділених буферів і одразу запускає наступний захват.
+Отриманий буфер лишається незмінним до наступного-після-наступного get(),
+тож Core0 рахує FFT паралельно з захватом: T_core0 ≈ max(T_cap, T_fft)
+замість T_cap + T_fft.
+
+Статистика: frames, wait_us (очікування DMA - якщо 0, вузьке місце FFT).
+"""
+
+import time
+from array import array
+import adc_dma
+
+
+class Capture:
+
+    def __init__(self, channel, sample_freq, n, mode='auto', level=10_000):
+        self.channel = channel
+        self.sample_freq = sample_freq
+        self.n = n
+        self.mode = mode
+        self.level = level
+        self.bufs = [array('h', bytes(2 * n)) for _ in range(2)]
+        self.views = [memoryview(b) for b in self.bufs]
+        self.peak = 0            # пікове значення останнього кадру (від buffer_i16)
+        self.frames = 0
+        self.wait_us = 0
+        self._k = 0
+        self._running = False
+
+    def start(self):
+        adc_dma.start(self.channel, self.sample_freq, self.n)
+        self._running = True
+
+    def get(self):
+        '''memoryview i16 готового кадру; наступний захват уже запущено'''
+        if not self._running:
+            self.start()
+        t0 = time.ticks_us()
+        while adc_dma.busy():
+            time.sleep_us(5)
+        self.wait_us += time.ticks_diff(time.ticks_us(), t0)
+        src, self.peak = adc_dma.buffer_i16(self.mode, self.level)
+        dst = self.views[self._k]
+        dst[:] = src
+        # семпли скопійовано - DMA-буфер можна віддати наступному захвату
+        adc_dma.close()
+        self.start()
+        self._k ^= 1
+        self.frames += 1
+        return dst
+
+    def stop(self):
+        if self._running:
+            while adc_dma.busy():
+                time.sleep_us(5)
+            adc_dma.close()
+            self._running = False
@@ -0,0 +1,156 @@
+# decimate.py
+# Децимація семплів перед FFT: FIR-фільтр нижніх частот + проріджування в D разів
+# Released under the MIT license
+"""
+IND_BANDS читає лише біни 1..50 (≈ 39 Гц … 2 кГц) з 512 бінів FFT на 40 кГц.
+Decimator знижує частоту семплування в D разів (FIR рахується лише для
+кожного D-го вихідного семплу), тож FFT на N / D точок дає ту саму
+роздільну здатність Fs / N і ті самі номери бінів:
+
+    front = Decimator(SAMPLE_FREQ, 4, FFT_SIZE // 4, f_pass=2000)
+    cap = Capture(ADC0, SAMPLE_FREQ, front.n_in)     # N + taps - D семплів захвату
+    spectr = fastfft.rfft(front.process(cap.get()), True)
+
+Фільтр - вікно Блекмана (≈ -74 dB), довжина з ширини перехідної смуги
+від f_pass до Fs/D - f_pass (те, що накладається на смуги після децимації).
+Коефіцієнти Q15, сума = 1 (рівень dBFS не змінюється).
+На RP2040 фільтр - @micropython.viper (цілі множення-накопичення).
+
+report() - оцінка: семпли захвату, точки FFT, MAC фільтра, виграш FFT.
+
+BlockStream - той самий фільтр для неперервного потоку блоків захвату
+(Stft, банк Герцеля по блоках): хвіст блоку (taps - D семплів) - історія
+FIR для наступного, тож результат як у фільтра всього потоку.
+"""
+
+import math
+import time
+from array import array
+
+try:
+    import micropython
+
+    @micropython.viper
+    def _fir_decimate(src, dst, n_out: int, taps, n_taps: int, d: int):
+        s = ptr16(src)
+        o = ptr16(dst)
+        h = ptr16(taps)
+        base = 0
+        for k in range(n_out):
+            acc = 0
+            for t in range(n_taps):
+                # ptr16 вертає 0..65535: розширення знака через зсуви
+                x = (int(s[base + t]) << 16) >> 16
+                c = (int(h[t]) << 16) >> 16
+                acc += x * c
+            y = acc >> 15
+            if y > 32767:
+                y = 32767
+            elif y < -32768:
+                y = -32768
+            o[k] = y
+            base += d
+
+except ImportError:
+    # CPython (host/emu.py): та сама цілочисельна арифметика
+    def _fir_decimate(src, dst, n_out, taps, n_taps, d):
+        base = 0
+        for k in range(n_out):
+            acc = 0
+            for t in range(n_taps):
+                acc += src[base + t] * taps[t]
+            y = acc >> 15
+            dst[k] = 32767 if y > 32767 else (-32768 if y < -32768 else y)
+            base += d
+
+
+def design_lowpass(sample_freq, f_pass, f_stop):
+    '''FIR (вікно Блекмана) з перехідною смугою f_pass..f_stop; array('h') Q15, сума = 1'''
+    n_taps = int(5.5 * sample_freq / (f_stop - f_pass) + 0.5) | 1
+    fc = 0.5 * (f_pass + f_stop) / sample_freq
+    mid = (n_taps - 1) / 2
+    h = []
+    for k in range(n_taps):
+        x = k - mid
+        sinc = 2 * fc if x == 0 else math.sin(2 * math.pi * fc * x) / (math.pi * x)
+        a = 2 * math.pi * k / (n_taps - 1)
+        h.append(sinc * (0.42 - 0.5 * math.cos(a) + 0.08 * math.cos(2 * a)))
+    total = sum(h)
+    return array('h', (int(32768 * c / total + 0.5) for c in h))
+
+
+class Decimator:
+
+    def __init__(self, sample_freq, factor, n_out, f_pass):
+        '''
+        sample_freq - частота захвату ADC, factor - D,
+        n_out       - точки FFT після децимації,
+        f_pass      - верхня частина смуг, яку треба зберегти (Гц)
+        '''
+        self.sample_freq = sample_freq
+        self.factor = factor
+        self.n_out = n_out
+        self.out_freq = sample_freq / factor
+        if factor > 1:
+            f_stop = self.out_freq - f_pass
+            if f_stop <= f_pass:
+                raise ValueError("decimation {} aliases into the bands below {} Hz".format(factor, f_pass))
+            self.taps = design_lowpass(sample_freq, f_pass, f_stop)
+        else:
+            self.taps = array('h', (32767,))
+        self.n_in = factor * n_out + len(self.taps) - factor
+        self.out = array('h', bytes(2 * n_out))
+        self._view = memoryview(self.out)
+        self.last_us = 0
+
+    def process(self, src):
+        '''src - i16 семпли захвату (n_in); вертає memoryview n_out семплів'''
+        if self.factor == 1:
+            return src
+        t0 = time.ticks_us()
+        _fir_decimate(src, self.out, self.n_out, self.taps, len(self.taps), self.factor)
+        self.last_us = time.ticks_diff(time.ticks_us(), t0)
+        return self._view
+
+    def report(self, full_size=None):
+        '''
+        оцінка виграшу відносно FFT на full_size точок без децимації
+        (за замовчуванням factor * n_out - та сама роздільна здатність)
+        '''
+        if full_size is None:
+            full_size = self.factor * self.n_out
+        n = self.n_out
+        fft_ratio = (n * math.log2(n)) / (full_size * math.log2(full_size))
+        return {
+            'out_freq': self.out_freq,
+            'fft_size': n,
+            'taps': len(self.taps),
+            'fir_mac': n * len(self.taps) if self.factor > 1 else 0,
+            'capture_samples': self.n_in,
+            'capture_ms': 1000 * self.n_in / self.sample_freq,
+            'resolution_hz': self.out_freq / n,
+            'fft_cost': fft_ratio,        # частка від часу FFT на full_size точок
+        }
+
+
+class BlockStream:
+
+    def __init__(self, front):
+        '''front - Decimator з n_out = block // factor (factor = 1 - без децимації)'''
+        self.front = front
+        self.block = front.factor * front.n_out     # семплів захвату на push()
+        self._hist = front.n_in - self.block        # історія FIR (taps - D)
+        self._in = array('h', bytes(2 * front.n_in))
+        self._view = memoryview(self._in)
+
+    def push(self, block):
+        '''block - наступні self.block семплів захвату (i16); вертає front.n_out нових
+           семплів після фільтра (memoryview, перезаписується наступним push())'''
+        src = self._view
+        hist = self._hist
+        src[hist:] = block
+        new = self.front.process(src)
+        # хвіст блоку - історія FIR для наступного блоку
+        if hist:
+            src[:hist] = src[self.block:]
+        return new
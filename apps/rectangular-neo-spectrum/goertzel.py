@@ -0,0 +1,137 @@
+# goertzel.py
+# Банк фільтрів Герцеля: енергії лише потрібних бінів замість повного FFT
+# Released under the MIT license
+"""
+GoertzelBank рахує ті самі енергії бінів, що й fastfft.rfft(buf, True)
+(вікно Ханна, |X[k]|**2 / N**2), але лише для бінів lo..hi-1, які читає
+BandEngine, і оновлює рекурсивні фільтри по мірі надходження семплів:
+
+    bank = GoertzelBank(N, band_engine.lo, band_engine.hi)
+    if bank.feed(block):                 # блок будь-якої довжини
+        band_spectr = band_engine.compute(bank.spec)
+
+feed() обробляє семпли одразу, тож після останнього семплу кадру
+лишається лише K фіналізацій (s1**2 + s2**2 - c*s1*s2), а не перетворення
+всього кадру. Ціна - K * N множень-додавань на кадр (K = hi - lo бінів),
+тому банк вигідний для невеликої кількості бінів або після децимації
+(decimate.py: K = 50, N = 256).
+
+spec - array('f') бінів 0..hi-1 (біни < lo лишаються 0), придатний для
+BandEngine.compute() і TripleBuffer.publish().
+"""
+
+import math
+import time
+from array import array
+
+try:
+    import micropython
+
+    @micropython.native
+    def _window_block(x, start: int, count: int, win, wpos: int, out):
+        for t in range(count):
+            out[t] = x[start + t] * win[wpos + t]
+
+    @micropython.native
+    def _update(x, count: int, coef, s1, s2):
+        for b in range(len(coef)):
+            c = coef[b]
+            a = s1[b]
+            z = s2[b]
+            for t in range(count):
+                v = x[t] + c * a - z
+                z = a
+                a = v
+            s1[b] = a
+            s2[b] = z
+
+except ImportError:
+    # CPython (host/emu.py): той самий алгоритм без native
+    def _window_block(x, start, count, win, wpos, out):
+        for t in range(count):
+            out[t] = x[start + t] * win[wpos + t]
+
+    def _update(x, count, coef, s1, s2):
+        for b in range(len(coef)):
+            c = coef[b]
+            a = s1[b]
+            z = s2[b]
+            for t in range(count):
+                v = x[t] + c * a - z
+                z = a
+                a = v
+            s1[b] = a
+            s2[b] = z
+
+
+class GoertzelBank:
+
+    def __init__(self, n, lo, hi, window=True):
+        '''
+        n      - довжина кадру (як FFT_SIZE для rfft), бін k = k * Fs / n
+        lo, hi - діапазон бінів (напр. band_engine.lo, band_engine.hi)
+        window - вікно Ханна, як fastfft.rfft(buf, True)
+        '''
+        self.n = n
+        self.lo = lo
+        self.hi = hi
+        k = hi - lo
+        self.coef = array('f', (2 * math.cos(2 * math.pi * b / n) for b in range(lo, hi)))
+        self.s1 = array('f', bytes(4 * k))
+        self.s2 = array('f', bytes(4 * k))
+        if window:
+            self.win = array('f', (0.5 - 0.5 * math.cos(2 * math.pi * t / (n - 1)) for t in range(n)))
+        else:
+            self.win = array('f', (1.0 for _ in range(n)))
+        self._block = array('f', bytes(4 * n))
+        self.spec = array('f', bytes(4 * hi))
+        self.scale = 1.0 / (n * n)
+        self.pos = 0              # семплів поточного кадру вже оброблено
+        self.frames = 0
+        self.last_us = 0          # час feed(), що завершив останній кадр
+
+    def reset(self):
+        '''почати кадр заново (напр. після паузи захвату)'''
+        for b in range(len(self.s1)):
+            self.s1[b] = 0.0
+            self.s2[b] = 0.0
+        self.pos = 0
+
+    def feed(self, samples):
+        '''
+        samples - семпли (i16 або float) будь-якої довжини;
+        True, якщо в цьому блоці завершився кадр (spec оновлено)
+        '''
+        t0 = time.ticks_us()
+        n = self.n
+        total = len(samples)
+        i = 0
+        done = False
+        while i < total:
+            count = min(n - self.pos, total - i)
+            _window_block(samples, i, count, self.win, self.pos, self._block)
+            _update(self._block, count, self.coef, self.s1, self.s2)
+            i += count
+            self.pos += count
+            if self.pos == n:
+                self._finish()
+                done = True
+        if done:
+            self.last_us = time.ticks_diff(time.ticks_us(), t0)
+        return done
+
+    def _finish(self):
+        s1 = self.s1
+        s2 = self.s2
+        coef = self.coef
+        spec = self.spec
+        lo = self.lo
+        scale = self.scale
+        for b in range(len(coef)):
+            a = s1[b]
+            z = s2[b]
+            spec[lo + b] = (a * a + z * z - coef[b] * a * z) * scale
+            s1[b] = 0.0
+            s2[b] = 0.0
+        self.pos = 0
+        self.frames += 1
@@ -0,0 +1,100 @@
+# layout.py
+# Автоматична розкладка смуг: логарифмічні межі для будь-яких Fs, FFT_SIZE, кількості смуг
+# Released under the MIT license
+"""
+Ручні таблиці застосунку (IND_BANDS, NOISE_THRESHOLD, BAND_GAIN_DB,
+rect_colors) підібрані під FFT 1024 точки на 40 кГц і 8 смуг. BandLayout
+будує такі самі таблиці для інших параметрів - один раз при старті:
+
+    layout = BandLayout(SAMPLE_FREQ, FFT_SIZE, f_min=39, f_max=2000, num_bands=16)
+    layout.start, layout.ind_bands          # для BandEngine(ind_bands, ..., start=start)
+    layout.per_band(NOISE_THRESHOLD, ref)   # значення, перенесені з ручної розкладки ref
+    layout.colors(rect_colors)              # палітра на num_bands кольорів
+
+Межі смуг - геометрична прогресія f_min * (f_max / f_min) ** (k / num_bands),
+округлена до бінів (крок Fs / FFT_SIZE); кожна смуга має щонайменше один бін,
+тож на низьких частотах, де біни рідші за логарифмічну сітку, смуги
+зсуваються вгору. Значення на смугу переносяться з ручної розкладки
+лінійною інтерполяцією за log2 центральної частоти смуги.
+
+На високих частотах смуги широкі (напр. 40 кГц / 1024 точки, 39 Гц ... 20 кГц,
+8 смуг - остання 277 бінів; 44.1 кГц / 8192, 16 смуг - до 1302 бінів).
+BandEngine сумує такі смуги з попереднім зсувом мантис (bands.py, shift),
+тож ширина смуги не обмежена 32-бітною сумою viper.
+"""
+
+import math
+
+
+def band_edges(sample_freq, fft_size, f_min, f_max, num_bands):
+    '''межі смуг у бінах: num_bands + 1 зростаючих номерів, смуга b - біни edges[b]..edges[b + 1] - 1'''
+    df = sample_freq / fft_size
+    lo = max(1, int(f_min / df + 0.5))
+    hi = min(fft_size // 2, int(f_max / df + 0.5))
+    if hi - lo < num_bands:
+        raise ValueError("{} bands need at least {} bins between {} and {} Hz, got {}".format(
+            num_bands, num_bands, f_min, f_max, hi - lo))
+    ratio = f_max / f_min
+    edges = [lo]
+    for k in range(1, num_bands):
+        e = int(f_min * ratio ** (k / num_bands) / df + 0.5)
+        # щонайменше один бін на смугу і місце для решти смуг
+        e = max(e, edges[-1] + 1)
+        e = min(e, hi - (num_bands - k))
+        edges.append(e)
+    edges.append(hi)
+    return edges
+
+
+def band_centres(start, ind_bands, df):
+    '''центральні частоти смуг (Гц) для розкладки start + ind_bands'''
+    centres = []
+    k = start
+    for w in ind_bands:
+        centres.append((k + (w - 1) / 2) * df)
+        k += w
+    return centres
+
+
+def _interp(x, xs, ys):
+    if x <= xs[0]:
+        return ys[0]
+    for i in range(1, len(xs)):
+        if x <= xs[i]:
+            t = (x - xs[i - 1]) / (xs[i] - xs[i - 1])
+            return ys[i - 1] + t * (ys[i] - ys[i - 1])
+    return ys[-1]
+
+
+class BandLayout:
+
+    def __init__(self, sample_freq, fft_size, f_min, f_max, num_bands):
+        self.df = sample_freq / fft_size
+        self.num = num_bands
+        edges = band_edges(sample_freq, fft_size, f_min, f_max, num_bands)
+        self.start = edges[0]
+        self.ind_bands = tuple(edges[b + 1] - edges[b] for b in range(num_bands))
+        self.centres = band_centres(self.start, self.ind_bands, self.df)
+
+    def per_band(self, values, ref_ind_bands, ref_df, ref_start=1):
+        '''
+        values - значення на смугу ручної розкладки ref_ind_bands (крок ref_df, від біна ref_start);
+        вертає tuple на num смуг (інтерполяція за log2 частоти, округлення до 0.1)
+        '''
+        xs = [math.log2(f) for f in band_centres(ref_start, ref_ind_bands, ref_df)]
+        return tuple(round(_interp(math.log2(f), xs, values), 1) for f in self.centres)
+
+    def colors(self, palette):
+        '''палітра (r, g, b) будь-якої довжини -> num кольорів (лінійна інтерполяція)'''
+        if self.num == len(palette):
+            return tuple(palette)
+        last = len(palette) - 1
+        out = []
+        for b in range(self.num):
+            x = b * last / (self.num - 1) if self.num > 1 else 0
+            i = min(int(x), last - 1)
+            t = x - i
+            c0 = palette[i]
+            c1 = palette[i + 1]
+            out.append(tuple(int(c0[k] + t * (c1[k] - c0[k]) + 0.5) for k in range(3)))
+        return tuple(out)
@@ -1,17 +1,25 @@
-import neopixel, time, random
+import neopixel, time, random, sys, select
 import machine
 from np_utils import *
+from panel import n, m, geo
 
 import array
 import math
 import adc_dma, fastfft
+from bands import BandEngine
+from spectr_exchange import TripleBuffer
+from capture import Capture
+from decimate import Decimator, BlockStream
+from goertzel import GoertzelBank
+from stft import Stft, auto_hop
+from layout import BandLayout
+from stage_times import StageTimes
 import _thread
 
 
-n = 16
-m = 16
-
+# кількість кілець (рівнів індикатора) - min(n, m) // 2: 8 на 16x16, 16 на 32x32
 np = neopixel.NeoPixel(machine.Pin(20), n * m)
+fb = Framebuffer(n, m, geo)
 
 green = 0, 24, 0
 green_ellow = 6, 10, 0
@@ -41,7 +49,26 @@ ADC0 = 0              # (GPIO26)
 IND_BANDS = (2, 1, 1, 1, 2, 7, 13, 23)
 
 NUM_BAND = 8 # кількість смуг
-FFT_SIZE = 1024
+# автоматична розкладка (layout.py): NUM_BAND логарифмічних смуг F_MIN..F_MAX для будь-яких
+# SAMPLE_FREQ і FFT_SIZE; NOISE_THRESHOLD, BAND_GAIN_DB і rect_colors переносяться з ручних
+# таблиць (вони - для FFT_SIZE = 1024 на 40 кГц і 8 смуг); False - ручні таблиці як є
+AUTO_LAYOUT = False
+F_MIN = 39           # Гц
+F_MAX = 2000         # Гц
+FFT_SIZE = 1024      # кадр на SAMPLE_FREQ: роздільна здатність SAMPLE_FREQ / FFT_SIZE
+# децимація перед FFT (decimate.py): FFT на FFT_SIZE // DECIMATION точок при тій самій
+# роздільній здатності та тих самих IND_BANDS; 1 - без децимації
+DECIMATION = 4
+# аналіз спектра: 'fft' - fastfft.rfft усього кадру, 'goertzel' - банк фільтрів Герцеля
+# лише для бінів band_engine.lo..hi (goertzel.py), ті самі енергії бінів і band_spectr
+ANALYSIS = 'fft'
+# банк Герцеля без STFT оновлюється по блоках захвату з GOERTZEL_BLOCK семплів (кратне
+# DECIMATION, дільник FFT_SIZE): спектр готовий одразу після останнього блоку кадру
+GOERTZEL_BLOCK = 256
+# STFT з перекриттям (stft.py): FFT кожні STFT_HOP нових семплів по кільцю останніх FFT_SIZE
+# (256 - перекриття 75 %, кратне DECIMATION); 'auto' - найменший крок, за який Core0
+# встигає FIR + FFT (вимірюється при старті); None - незалежні кадри по FFT_SIZE семплів
+STFT_HOP = 'auto'
 # Опорна потужність повномасштабного синуса, берем за 0 dB (Standard AES17 Reference)
 FS_RMS2 = 32767**2 / 2
 
@@ -63,180 +90,282 @@ BAND_GAIN_DB = (
 # коефіцієнт для визначення домінантних частотних смуг
 DOMINANCE_FACTOR = 1.2
 
-# ======================================
-# Cинхронізація
-# ======================================
-lock = _thread.allocate_lock()
-
-# 1-слотовий обмін спектром (memoryview від fastfft)
-spectr_front = None        # посилання на memoryview
-spectr_busy  = False       # True: Core1 ще НЕ завершив роботу зі spectr_front
+BAND_START = 1       # перший бін першої смуги (бін 0 - постійна складова)
+if AUTO_LAYOUT:
+    # розкладка і таблиці на смугу - один раз при старті, на кадр нічого не додається
+    layout = BandLayout(SAMPLE_FREQ, FFT_SIZE, F_MIN, F_MAX, NUM_BAND)
+    REF_DF = 40_000 / 1024     # крок бінів, під який підібрані ручні таблиці
+    NOISE_THRESHOLD = layout.per_band(NOISE_THRESHOLD, IND_BANDS, REF_DF)
+    BAND_GAIN_DB = layout.per_band(BAND_GAIN_DB, IND_BANDS, REF_DF)
+    rect_colors = layout.colors(rect_colors)
+    IND_BANDS = layout.ind_bands
+    BAND_START = layout.start
 
+# межі смуг і dB-зсув кожної смуги (підсилення + шумовий поріг) - один раз
+band_engine = BandEngine(IND_BANDS, FS_RMS2, start=BAND_START,
+                         bias=[BAND_GAIN_DB[i] + NOISE_THRESHOLD[i] for i in range(NUM_BAND)])
 
-def band_dbfs(spec, i, j):
-    # вертає значення dBFS для смуги частот (для діапазону бінів [i, j[ )
-    # e = сума енергій бінів у смузі (очікується, що spec[k] >= 0)
-    e = 0
-    for k in range(i, j):
-        e += spec[k]
-    
-    if e <= 0:
-        return -120
-   
-    return 10.0 * math.log10((2.0 * e) / FS_RMS2)
 
 def build_band_spectr(spec):
-    ind = 1
-    band_spectr = [0.0] * NUM_BAND
+    # dBFS усіх смуг за один прохід по бінах (bands.py);
+    # вертає список band_engine.db, який перезаписується наступним кадром
+    return band_engine.compute(spec)
+
+
+# потрійний буфер спектра: Core0 копіює біни 0..band_engine.hi і не чекає на Core1,
+# Core1 бере найновіший готовий кадр (spectr_exchange.py)
+exchange = TripleBuffer(band_engine.hi)
+
+N_FFT = FFT_SIZE // DECIMATION                  # точок FFT після децимації
+F_PASS = band_engine.hi * SAMPLE_FREQ / FFT_SIZE  # FIR зберігає біни 0..band_engine.hi (≈ 2 кГц)
+
+if ANALYSIS == 'goertzel':
+    bank = GoertzelBank(N_FFT, band_engine.lo, band_engine.hi)
+else:
+    bank = None
+
+
+def analyse(buf):
+    # FFT (повертає memoryview на внутрішній буфер fastfft) або банк Герцеля (bank.spec);
+    # None - банк отримав блок, але кадр ще не завершено (потік по GOERTZEL_BLOCK)
+    if bank is None:
+        return fastfft.rfft(buf, True)
+    if bank.feed(buf):
+        return bank.spec
+    return None
+
+
+def measure_hop():
+    # ціна FIR (на семпл захвату) та аналізу кадру на цій платі -> найменший крок STFT
+    trial = Decimator(SAMPLE_FREQ, DECIMATION, N_FFT, F_PASS)
+    samples = array.array('h', bytes(2 * trial.n_in))
+    t0 = time.ticks_us()
+    buf = trial.process(samples)
+    t_sample = time.ticks_diff(time.ticks_us(), t0) / (DECIMATION * N_FFT)
+    t0 = time.ticks_us()
+    analyse(buf)
+    t_frame = time.ticks_diff(time.ticks_us(), t0)
+    return auto_hop(t_frame, t_sample, SAMPLE_FREQ, DECIMATION, FFT_SIZE)
+
+
+stream = None
+if STFT_HOP is None and bank is not None:
+    # Герцель по блоках: FIR кожного блоку з історією, фільтри банку - одразу
+    front = Decimator(SAMPLE_FREQ, DECIMATION, GOERTZEL_BLOCK // DECIMATION, F_PASS)
+    stream = BlockStream(front)
+    stft = None
+elif STFT_HOP is None:
+    # незалежні кадри: FIR + проріджування всього захвату
+    front = Decimator(SAMPLE_FREQ, DECIMATION, N_FFT, F_PASS)
+    stft = None
+else:
+    # FIR лише нових STFT_HOP семплів, кадр FFT - з кільця останніх N_FFT
+    hop = measure_hop() if STFT_HOP == 'auto' else STFT_HOP
+    front = Decimator(SAMPLE_FREQ, DECIMATION, hop // DECIMATION, F_PASS)
+    stft = Stft(N_FFT, front)
+
+
+# ---------------- рендер без алокацій (Core1) ----------------
+# Core1 працює з цілими: потужності смуг у Q8 (1/256 dB, band_engine.compute_q8),
+# ранжування у заздалегідь виділеному bytearray, кільця - готові масиви зсувів.
+# Жодних dict/list/sorted і float-об'єктів на кадр, тож gc не зупиняє індикатор.
+
+# rect_map[num] - зсуви пікселів кільця num у fb.buf (усі кільця разом - уся панель)
+rect_map = [
+    array.array('H', (fb.offset(i, j) for i, j in koord_by_dot_rect_perimeter(n, m, num)))
+    for num in range(min(n, m) // 2)
+    ]
+NUM_LEVEL = len(rect_map)      # рівні індикатора 0..NUM_LEVEL
 
-    for i, w in enumerate(IND_BANDS):
-        adj = band_dbfs(spec, ind, ind + w)
+_order = bytearray(NUM_BAND)   # смуги за зростанням потужності
+_dom = bytearray(NUM_BAND)     # домінантні смуги за зростанням потужності
+# p >= DOMINANCE_FACTOR * mean  <=>  p * NUM_BAND * 1024 >= DOMINANCE_Q10 * sum
+DOMINANCE_Q10 = int(DOMINANCE_FACTOR * 1024 + 0.5)
 
-        band_spectr[i] = adj + BAND_GAIN_DB[i] + NOISE_THRESHOLD[i]
-        ind += w
-    return band_spectr
 
+def rank_bands(power, order):
+    # стабільне сортування вставками (як sorted()): order - індекси смуг за зростанням power
+    for b in range(NUM_BAND):
+        p = power[b]
+        k = b
+        while k > 0 and power[order[k - 1]] > p:
+            order[k] = order[k - 1]
+            k -= 1
+        order[k] = b
 
-def draw_rect(level, freq_level):
-    np.fill((0, 0, 0))
-    if level == 0:
-        np.write()
-        return
 
-    # Отримуємо потужності
-    powers = list(freq_level.values())
-    mean_power = sum(powers) / len(powers)
+def band_sum(power):
+    total = 0
+    for b in range(NUM_BAND):
+        total += power[b]
+    return total
 
-    # Вибираємо домінантні смуги
-    dominant_colors = [c for c, p in freq_level.items() if p >= DOMINANCE_FACTOR * mean_power]
 
-    if dominant_colors:
-        # Сортуємо домінанти за потужністю
-        dominant_colors_sorted = sorted(dominant_colors, key=freq_level.get)
-        n_dom = len(dominant_colors_sorted)
+def paint_rect(level, power):
+    # power - потужності смуг у Q8 (band_engine.db_q8), смуга b має колір rect_colors[b];
+    # лише малює кільця у fb.buf (відправка на стрічку - fb.commit(np))
+    if level == 0:
+        for num in range(len(rect_map)):
+            fb.paint(rect_map[num], nothing)
+        return
 
-        for num in range(level):
+    rank_bands(power, _order)
+
+    # Вибираємо домінантні смуги (уже впорядковані за потужністю)
+    total = band_sum(power)
+    n_dom = 0
+    for k in range(NUM_BAND):
+        b = _order[k]
+        if power[b] * (NUM_BAND * 1024) >= DOMINANCE_Q10 * total:
+            _dom[n_dom] = b
+            n_dom += 1
+
+    for num in range(len(rect_map)):
+        if num >= level:
+            color = nothing
+        elif n_dom:
             if n_dom >= level:
-                color = dominant_colors_sorted[-level + num]
+                color = rect_colors[_dom[n_dom - level + num]]
             else:
                 # Якщо рівнів більше, ніж домінант, повторюємо останній домінант
-                color = dominant_colors_sorted[num] if num < n_dom else dominant_colors_sorted[-1]
+                color = rect_colors[_dom[num if num < n_dom else n_dom - 1]]
+        else:
+            # стандартна логіка: за потужністю
+            k = (num + NUM_BAND - 1 - level) % NUM_BAND
+            color = rect_colors[_order[k]]
+        fb.paint(rect_map[num], color)
 
-            for pix in rect_map[num]:
-                np[pix] = color
 
-    else:
-        # стандартна логіка: сортування по потужності
-        rect_colors_sorted = sorted(freq_level, key=freq_level.get)
-        for num in range(level):
-            for pix in rect_map[num]:
-                np[pix] = rect_colors_sorted[num + 7 - level]
-
-    np.write()
-    
-    
-# rect_maps
-rect_map = [
-    tuple(xy_to_i(i, j, m) for i, j in koord_by_dot_rect_perimeter(n, m, num))
-    for num in range(m // 2)
-    ]
+def draw_rect(level, power):
+    paint_rect(level, power)
+    fb.commit(np)
+
+
+# AGC у Q8: ті самі параметри, що й у dB вище
+_scale_q8 = int(_scale_db * 256)
+SCALE_MIN_Q8 = int(SCALE_MIN_DB * 256)
+SCALE_DECAY_Q8 = int(SCALE_DECAY_DB * 256 + 0.5)
+HEADROOM_Q8 = int(HEADROOM_DB * 256 + 0.5)
+# рівень = int((adj / scale) ** GAMMA * NUM_LEVEL + 0.5): рівень k вмикається,
+# коли adj >= scale * ((k - 0.5) / NUM_LEVEL) ** (1 / GAMMA) - пороги в Q10
+LEVEL_Q10 = array.array('i', (int(1024 * ((k - 0.5) / NUM_LEVEL) ** (1 / GAMMA) + 0.5)
+                              for k in range(1, NUM_LEVEL + 1)))
+
 
 def build_peak_level(adj):
-    global _scale_db
+    # adj - сума потужностей смуг у Q8; вертає рівень 0..NUM_LEVEL
+    global _scale_q8
 
-    if adj < 0.0:
-        adj = 0.0
+    if adj < 0:
+        adj = 0
 
-    target = adj + HEADROOM_DB
+    target = adj + HEADROOM_Q8
 
-    if target > _scale_db:
-        _scale_db = target
+    if target > _scale_q8:
+        _scale_q8 = target
     else:
-        _scale_db -= SCALE_DECAY_DB
-        if _scale_db < target:
-            _scale_db = target
-        if _scale_db < SCALE_MIN_DB:
-            _scale_db = SCALE_MIN_DB
+        _scale_q8 -= SCALE_DECAY_Q8
+        if _scale_q8 < target:
+            _scale_q8 = target
+        if _scale_q8 < SCALE_MIN_Q8:
+            _scale_q8 = SCALE_MIN_Q8
+
+    denom = _scale_q8 if _scale_q8 > 0 else 1
 
-    denom = _scale_db if _scale_db > 1e-6 else 1e-6
+    lvl = 0
+    for k in range(NUM_LEVEL):
+        if adj * 1024 < LEVEL_Q10[k] * denom:
+            break
+        lvl = k + 1
 
-    x = adj / denom
-    if x > 1.0:
-        x = 1.0
+    return lvl
 
-    y = x ** GAMMA
+# ---------------- час етапів (stage_times.py) ----------------
+# кожне ядро пише лише у свої кільцеві буфери (останні 128 кадрів), без print() у циклі;
+# зведення - stats() у REPL або 's' + Enter по USB/UART під час роботи
+prof0 = StageTimes(('cap', 'front', 'fft', 'publish'))
+prof1 = StageTimes(('wait', 'dsp', 'render', 'write'))
+STATS_POLL = 32      # як часто (кадрів Core0) перевіряти запит зведення
 
-    lvl = int(y * 8.0 + 0.5)
-    if lvl > 8:
-        lvl = 8
 
-    return lvl
+def stats():
+    # min / mean / p95 / max (мкс) етапів, період кадру та FPS обох ядер
+    prof0.report('core0')
+    prof1.report('core1')
+    print('core1 skipped frames:', exchange.dropped())
+
 
 def core1_dsp_led_worker():
-    global spectr_busy
 
     while True:
-        # --- забрати спектр (memoryview) ---
-        lock.acquire()
-        if spectr_busy:
-            spectr = spectr_front  # локальне посилання на memoryview
-            lock.release()
+        prof1.begin()
 
-            # --- DSP: смуги + AGC ---
-            band_spectr = build_band_spectr(spectr)
-            level = build_peak_level(sum(band_spectr))
+        # --- найновіший спектр (чекаємо, поки Core0 опублікує новий кадр) ---
+        spectr = exchange.acquire()
+        while spectr is None:
+            time.sleep_us(50)
+            spectr = exchange.acquire()
+        prof1.mark(0)
 
-            # --- render + np.write() ---
-            color_level = {c: band for c, band in zip(rect_colors, band_spectr)}
-            draw_rect(level, color_level)
+        # --- DSP: смуги (Q8) + AGC ---
+        band_q8 = band_engine.compute_q8(spectr)
+        level = build_peak_level(band_sum(band_q8))
+        prof1.mark(1)
 
-            # --- дозволяємо Core0 робити наступний rfft ---
-            lock.acquire()
-            spectr_busy = False
-            lock.release()
-
-        else:
-            lock.release()
-            time.sleep_us(50)
+        # --- render + np.write() ---
+        paint_rect(level, band_q8)
+        prof1.mark(2)
+        fb.commit(np)
+        prof1.mark(3)
 
 # ---------------- Core0 main loop ----------------
 def core0_main_loop():
-    global spectr_front, spectr_busy
+    # подвійний буфер семплів: наступний захват ADC іде паралельно з FFT (capture.py)
+    # без STFT front.n_in = FFT_SIZE + (taps - DECIMATION) семплів: FIR без крайових нулів;
+    # зі STFT - лише stft.hop нових семплів (історію FIR тримає Stft); Герцель без STFT -
+    # блоки по GOERTZEL_BLOCK семплів (історію FIR тримає BlockStream)
+    if stream is not None:
+        block = stream.block
+    elif stft is None:
+        block = front.n_in
+    else:
+        block = stft.hop
+    cap = Capture(ADC0, SAMPLE_FREQ, block, 'auto', 10_000)
+    # запит зведення з USB/UART без блокування циклу
+    console = select.poll()
+    console.register(sys.stdin, select.POLLIN)
 
     while True:
-        t0 = time.ticks_us()
-        
-        # 1) Захват ADC
-        adc_dma.start(ADC0, SAMPLE_FREQ, FFT_SIZE)
-        while adc_dma.busy():
-            time.sleep_us(5)
-
-        # отримуємо буфер (тут важливо НЕ робити close() до завершення FFT)
-        buf, lvl = adc_dma.buffer_i16('auto', 10_000)
-
-        # 2) Перед викликом rfft() чекаємо, поки Core1 завершив читання попереднього спектра
-        while True:
-            lock.acquire()
-            busy = spectr_busy
-            lock.release()
-            if not busy: # Core1 вже завершив обробку
-                break
-            time.sleep_us(50)
-
-        # 3) FFT (повертає memoryview на внутрішній буфер fastfft)
-        spectr = fastfft.rfft(buf, True)
-
-        # 4) Тепер можна закрити adc_dma (бо FFT вже прочитав buf)
-        adc_dma.close()
-
-        # 5) Публікація спектра для Core1
-        lock.acquire()
-        spectr_front = spectr
-        spectr_busy = True
-        lock.release()
-        
-        t1 = time.ticks_us()
-        print(time.ticks_diff(t1, t0))
+        prof0.begin()
+
+        # 1) Готовий кадр семплів (i16); DMA вже заповнює наступний
+        buf = cap.get()
+        prof0.mark(0)
+
+        # 2) FIR + децимація в DECIMATION разів (при DECIMATION = 1 - той самий buf);
+        #    зі STFT - новий блок у кільце і кадр з останніх N_FFT семплів
+        if stream is not None:
+            buf = stream.push(buf)
+        elif stft is None:
+            buf = front.process(buf)
+        else:
+            stft.push(buf)
+            buf = stft.frame()
+        prof0.mark(1)
+
+        # 3) FFT або банк Герцеля; Core1 читає власну копію, тож чекати на нього не потрібно
+        spectr = analyse(buf)
+        prof0.mark(2)
+
+        # 4) Копія потрібних бінів у вільний буфер обміну і публікація для Core1;
+        #    банк по блоках публікує лише завершені кадри
+        if spectr is not None:
+            exchange.publish(spectr)
+        prof0.mark(3)
+
+        if prof0.count % STATS_POLL == 0 and console.poll(0):
+            if sys.stdin.read(1) == 's':
+                stats()
 
 
 if __name__ == '__main__':
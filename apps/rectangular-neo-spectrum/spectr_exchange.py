@@ -0,0 +1,83 @@
+# spectr_exchange.py
+# Потрійний буфер спектра між Core0 (FFT) та Core1 (смуги + рендер) без блокувань
+# Released under the MIT license
+"""
+Core0 копіює потрібні біни спектра в один з трьох заздалегідь виділених
+буферів і одразу йде на наступний кадр; Core1 завжди бере найновіший
+готовий кадр (latest wins), проміжні кадри пропускаються.
+
+    ex = TripleBuffer(size)          # size - скільки бінів потрібно (напр. BandEngine.hi)
+    # Core0:
+    ex.publish(spectr)               # копія spectr[:size], публікація
+    # Core1:
+    spec = ex.acquire()              # найновіший кадр або None, якщо нового немає
+
+Стан - три байти bytearray (запис байта атомарний на обох ядрах):
+  latest  - останній опублікований буфер,
+  reading - буфер, який читає Core1 (Core0 у нього не пише),
+  fresh   - є кадр, який Core1 ще не брав.
+Core0 пише лише у буфер, що не є ні latest, ні reading. Core1 після
+оголошення reading перевіряє, що latest не змінився, інакше повторює -
+тож Core0 ніколи не перезапише кадр, який читає Core1.
+"""
+
+from array import array
+
+_LATEST = 0
+_READING = 1
+_FRESH = 2
+
+
+class TripleBuffer:
+
+    def __init__(self, size):
+        self.size = size
+        self.bufs = [array('f', bytes(4 * size)) for _ in range(3)]
+        self.views = [memoryview(b) for b in self.bufs]
+        # latest = 0, reading = 0: поки нічого не опубліковано
+        self._st = bytearray(3)
+        self.published = 0     # кадри від Core0
+        self.consumed = 0      # кадри, взяті Core1
+
+    # ---- Core0 (writer)
+    def back(self):
+        '''вільний буфер для запису кадру (не latest і не reading)'''
+        st = self._st
+        latest = st[_LATEST]
+        reading = st[_READING]
+        for w in range(3):
+            if w != latest and w != reading:
+                return w
+
+    def publish(self, src=None, w=None):
+        '''
+        src - спектр (memoryview від fastfft): копіюються перші size бінів;
+        або src=None і w - буфер, уже заповнений через views[back()]
+        '''
+        if w is None:
+            w = self.back()
+        if src is not None:
+            self.views[w][:] = src[:self.size]
+        st = self._st
+        st[_LATEST] = w
+        st[_FRESH] = 1
+        self.published += 1
+
+    # ---- Core1 (reader)
+    def acquire(self):
+        '''memoryview найновішого кадру або None, якщо нового кадру немає'''
+        st = self._st
+        if not st[_FRESH]:
+            return None
+        st[_FRESH] = 0
+        while True:
+            r = st[_LATEST]
+            st[_READING] = r
+            if st[_LATEST] == r:
+                break
+        self.consumed += 1
+        return self.views[r]
+
+    def dropped(self):
+        '''кадри, які Core1 не встиг взяти (перезаписані новішими)'''
+        return self.published - self.consumed
@@ -0,0 +1,100 @@
+# stft.py
+# STFT з перекриттям: кільцевий буфер останніх N семплів, FFT кожні hop семплів
+# Released under the MIT license
+"""
+Без STFT кожен кадр - окремий захват FFT_SIZE семплів, тож частота кадрів
+і роздільна здатність зв'язані (T_cap = FFT_SIZE / Fs). Stft тримає
+кільцевий буфер останніх n семплів (після децимації) і віддає кадр для FFT
+після кожного блоку з hop нових семплів (hop = 256 з 1024 - перекриття 75 %):
+
+    front = Decimator(SAMPLE_FREQ, D, hop // D, f_pass)   # FIR лише нового блоку
+    stft = Stft(FFT_SIZE // D, front)
+    cap = Capture(ADC0, SAMPLE_FREQ, stft.hop)            # захват по hop семплів
+    while True:
+        stft.push(cap.get())
+        spectr = fastfft.rfft(stft.frame(), True)
+
+- децимується лише новий блок (decimate.BlockStream): хвіст попереднього
+  блоку (taps - D семплів) - історія FIR, тож потік після фільтра неперервний;
+- кільце і кадр - заздалегідь виділені array('h'); frame() лінеаризує
+  кільце (від найстарішого семплу) двома копіюваннями;
+- вікно Ханна накладає fastfft.rfft(..., True) на кожен кадр;
+- hop не менший за час FIR + FFT на Core0, інакше захват відстає -
+  auto_hop() підбирає його з виміряної ціни (див. rectangle_neo_spectr.py),
+  але не менше n / 8 кадру захвату.
+"""
+
+from array import array
+from decimate import BlockStream
+
+
+def auto_hop(t_fixed_us, t_sample_us, sample_freq, step, max_hop, margin=1.25, min_hop=None):
+    '''
+    найменший hop (кратний step, від min_hop до max_hop), за який Core0 встигає:
+    hop / Fs >= margin * (t_fixed + hop * t_sample)
+    t_fixed_us  - час на кадр, що не залежить від hop (FFT), мкс
+    t_sample_us - час на один вхідний семпл (FIR), мкс
+    min_hop     - нижня межа, за замовчуванням max_hop // 8 (перекриття 87.5 %):
+                  дрібніший крок дає майже однакові кадри, а виміряна ціна, близька
+                  до нуля (напр. Герцель/FIR без моделі ціни в емуляторі), не зводить
+                  крок до step
+    '''
+    if min_hop is None:
+        min_hop = max_hop // 8
+    lo = max(step, -(-min_hop // step) * step)
+    period_us = 1_000_000 / sample_freq
+    free = period_us - margin * t_sample_us
+    if free <= 0:
+        return max_hop
+    hop = int(margin * t_fixed_us / free) + 1
+    hop = -(-hop // step) * step
+    return min(max(hop, lo), max_hop)
+
+
+class Stft:
+
+    def __init__(self, n, front):
+        '''
+        n     - довжина кадру FFT (семпли після децимації)
+        front - Decimator з n_out = hop // factor (factor = 1 - без децимації)
+        '''
+        self.n = n
+        self.front = front
+        self.stream = BlockStream(front)            # FIR нових блоків з історією
+        self.hop = self.stream.block                # нових семплів захвату на кадр
+        self.step = front.n_out                     # нових семплів у кільці на кадр
+        if self.step > n:
+            raise ValueError("hop {} is longer than the frame".format(self.hop))
+        self.ring = array('h', bytes(2 * n))
+        self._ring_view = memoryview(self.ring)
+        self.out = array('h', bytes(2 * n))
+        self._out_view = memoryview(self.out)
+        self.pos = 0             # куди пишеться наступний блок (найстаріший семпл)
+        self.frames = 0
+
+    def push(self, block):
+        '''block - hop нових семплів захвату (i16)'''
+        new = self.stream.push(block)
+        n = self.n
+        pos = self.pos
+        step = self.step
+        ring = self._ring_view
+        head = n - pos
+        if step <= head:
+            ring[pos:pos + step] = new
+        else:
+            ring[pos:] = new[:head]
+            ring[:step - head] = new[head:]
+        self.pos = (pos + step) % n
+        self.frames += 1
+
+    def frame(self):
+        '''memoryview кадру n семплів у порядку часу (від найстарішого)'''
+        out = self._out_view
+        ring = self._ring_view
+        pos = self.pos
+        head = self.n - pos
+        out[:head] = ring[pos:]
+        if pos:
+            out[head:] = ring[:pos]
+        return out
@@ -11,13 +11,15 @@
 
 import time, random
 import collections
+import machine
 from neopixel import NeoPixel as np
+from np_utils import Framebuffer
+from frame_sched import FrameScheduler
+from panel import n, m, geo, coord_to_pix
 
 
-n = 16         # number of row
-m = 16         # number of col
 neo_pin = 20   # output to LED panel 
-speed = 20
+fps = 50       # animation frame rate, frames/s
 
 green = 0, 24, 0
 low_green = 0, 1, 0
@@ -35,21 +37,17 @@ brown = 18, 4, 0
 
 colors = (green, red, yellow, magenta, blue, nothing)
 pix = np(machine.Pin(neo_pin), n * m)
+# кадр малюється у fb за neopixel-індексами, на стрічку - через таблицю яскравості
+fb = Framebuffer(n, m, geo)
+# кадри за дедлайнами; якщо write() не встигає - кадри зливаються
+sched = FrameScheduler(fps)
 
 # used at will
 # button_start = machine.Pin(15, machine.Pin.IN, machine.Pin.PULL_UP)
 
-def coord_to_pix(i, j):
-        '''
-        отримує координати матриці (row x col) row = i, col =  j
-        вертає neopixel-коефіцієнт LED-матриці
-        '''
-        return m * i + j if i % 2 else m-j-1 + m * i
-
 def clear():
-    for i in range(len(pix)):
-        pix[i] = 0, 0, 0
-    pix.write()
+    fb.clear()
+    fb.commit(pix)
     
 class Deque():
         
@@ -114,13 +112,13 @@ def main_run(path_l, path_r, colors, color_2):
     color_2 = random.choice(l)
                
     for vertex in path_r:
-        pix[vertex] = color_1
-        pix.write()
-        time.sleep_ms(speed)
+        fb.set_pix(vertex, color_1)
+        if sched.due():
+            fb.commit(pix)
     for vertex in path_l[::-1]:
-        pix[vertex] = color_2
-        pix.write()
-        time.sleep_ms(speed)
+        fb.set_pix(vertex, color_2)
+        if sched.due():
+            fb.commit(pix)
     return color_2
 
 if __name__ == '__main__':
@@ -128,5 +126,6 @@ if __name__ == '__main__':
     path_l = find_path(n, m, 'left')  # шлях обходу вліво
     path_r = find_path(n, m)          # шлях обходу вправо
     color = random.choice(colors)   
+    sched.start()
     while True:
         color = main_run(path_l, path_r, colors, color)
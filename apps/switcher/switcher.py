@@ -19,11 +19,14 @@ _btn = machine.Pin(BTN_PIN, machine.Pin.IN, machine.Pin.PULL_UP)
 
 _pending = False
 _last_irq_ms = 0
+_flag = None   # aiorun.ThreadSafeFlag, коли працює задача serve()
 
 def _irq(_pin):
     global _pending, _last_irq_ms
     _pending = True
     _last_irq_ms = time.ticks_ms()
+    if _flag is not None:
+        _flag.set()
 
 # IRQ лише ставить прапорець (без I/O і без reset)
 _btn.irq(trigger=machine.Pin.IRQ_FALLING, handler=_irq)
@@ -88,6 +91,19 @@ def service():
 
     _pending = False
 
+async def serve():
+    """
+    Задача asyncio для застосунків на aiorun: чекає на IRQ кнопки
+    (без опитування кожні 10 мс), після debounce - як service().
+    """
+    global _flag
+    import aiorun
+    _flag = aiorun.ThreadSafeFlag()
+    while True:
+        await _flag.wait()
+        await aiorun.sleep_ms(DEBOUNCE_MS)
+        service()
+
 def sleep_ms(ms, step=10):
     """
     Заміна time.sleep_ms(), щоб кнопка відпрацьовувала під час затримок.
@@ -0,0 +1,49 @@
+# _thread.py - host stand-in for the MicroPython `_thread` module (see emu.py)
+# "Core1" працює як звичайний потік CPython; emu.Stop завершує і його.
+import threading
+import emu
+
+
+class LockType:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def acquire(self, waitflag=1, timeout=-1):
+        return self._lock.acquire(bool(waitflag), timeout)
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def allocate_lock():
+    return LockType()
+
+
+def _run(function, args, kwargs):
+    try:
+        function(*args, **(kwargs or {}))
+    except emu.Stop:
+        pass
+
+
+def start_new_thread(function, args, kwargs=None):
+    t = threading.Thread(target=_run, args=(function, args, kwargs), daemon=True)
+    t.start()
+    return t.ident
+
+
+def get_ident():
+    return threading.get_ident()
+
+
+def exit():
+    raise SystemExit
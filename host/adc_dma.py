@@ -0,0 +1,104 @@
+# adc_dma.py - host stand-in for the `adc_dma` C-module (see emu.py)
+# Семпли беруться з emu.adc_source (callable) або з синтетичного сигналу;
+# replay(path) - джерело з файлу WAV (запис мікрофона), див. emu.py --adc-file.
+# Захоплення триває n / sample_freq віртуального часу.
+import math
+import random
+import wave
+from array import array
+import emu
+
+_raw = None        # array('H') 12-бітні семпли, як у DMA-буфері
+_i16 = None
+_t_end = 0
+_busy = False
+
+
+def synth_source(channel, sample_freq, n, t_us):
+    """Тестовий сигнал: 3 тони з повільною модуляцією + шум, DC = 2048."""
+    out = []
+    t0 = t_us / 1_000_000
+    env = 0.5 + 0.5 * math.sin(2 * math.pi * 0.7 * t0)
+    for k in range(n):
+        t = t0 + k / sample_freq
+        v = (600 * env * math.sin(2 * math.pi * 110 * t)
+             + 300 * math.sin(2 * math.pi * 440 * t)
+             + 200 * (1 - env) * math.sin(2 * math.pi * 1500 * t)
+             + random.gauss(0, 8))
+        out.append(2048 + int(v))
+    return out
+
+
+def replay(path, loop=True):
+    """
+    Джерело семплів з WAV (8/16 біт, канал 0): семпл береться за віртуальним часом,
+    тож пропущені між захватами ділянки запису справді пропускаються.
+    16-бітні семпли переводяться у 12 біт ADC з DC = 2048.
+    """
+    with wave.open(path, "rb") as f:
+        rate = f.getframerate()
+        width = f.getsampwidth()
+        channels = f.getnchannels()
+        raw = f.readframes(f.getnframes())
+    if width == 2:
+        data = array('h', raw)[::channels]
+        pcm = [2048 + (s >> 4) for s in data]
+    elif width == 1:
+        pcm = [b << 4 for b in raw[::channels]]
+    else:
+        raise ValueError("unsupported WAV sample width: {}".format(width))
+    size = len(pcm)
+
+    def source(channel, sample_freq, n, t_us):
+        out = []
+        for k in range(n):
+            i = int((t_us / 1_000_000 + k / sample_freq) * rate)
+            if i >= size:
+                if not loop:
+                    out.append(2048)
+                    continue
+                i %= size
+            out.append(pcm[i])
+        return out
+    return source
+
+
+def start(channel, sample_freq, n):
+    global _raw, _t_end, _busy
+    source = emu.adc_source or synth_source
+    samples = source(channel, sample_freq, n, emu.clock.us)
+    _raw = array('H', (min(4095, max(0, int(s))) for s in samples))
+    _t_end = emu.clock.us + int(1_000_000 * n / sample_freq)
+    _busy = True
+
+
+def busy():
+    # віртуальний час одразу переводиться на кінець захоплення (без холостого опитування)
+    global _busy
+    if _busy:
+        if emu.clock.us < _t_end:
+            emu.clock.advance(_t_end - emu.clock.us)
+        _busy = False
+    return False
+
+
+def buffer():
+    return memoryview(_raw)
+
+
+def buffer_i16(mode='auto', level=10_000):
+    """
+    Вертає (memoryview i16, рівень).
+    Наближення C-модуля: mode='auto' - DC прибирається середнім значенням,
+    12 біт масштабуються до i16 (x16); рівень - пікове значення по модулю.
+    """
+    global _i16
+    dc = sum(_raw) // len(_raw) if mode == 'auto' else 2048
+    _i16 = array('h', (max(-32768, min(32767, (s - dc) << 4)) for s in _raw))
+    peak = max(abs(s) for s in _i16)
+    return memoryview(_i16), peak
+
+
+def close():
+    global _busy
+    _busy = False
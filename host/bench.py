@@ -0,0 +1,332 @@
+# ----------------------------------------------------------------------------
+# Per-app frame-time benchmarks on the host emulator (see emu.py)
+# ----------------------------------------------------------------------------
+# Released under the MIT license
+"""
+Проганяє "гарячі" функції застосунків N кадрів і вимірює:
+  - час кадру (mean / p99, мкс) - реальний час CPython одного виклику функції
+    рендеру (draw_rect, draw_clock, look); кадр, у якому commit() нічого не
+    записав, рахується окремо, а не зливається з наступним. Анімації, що
+    самі комітять через FrameSched (light_path, write_neo, spiral), - час
+    між np.write(); віртуальні паузи (sleep_ms) не враховуються;
+  - час першого кадру (warmup_us) - окремо, до mean / p99 прогрів не входить;
+    прохід часу повторюється --repeat разів і береться той, де p99 найменший
+    (як timeit.repeat): поодинокі паузи ОС у кілька мс інакше стають p99;
+  - алокації кожного кадру (tracemalloc, байт): пік понад рівень на початку
+    кадру і чистий приріст пам'яті за кадр - get_traced_memory() до і після
+    кадру; окремий прохід, щоб tracemalloc не спотворював час;
+  - кількість пікселів, що змінились за кадр (0 - коміт пропущено).
+
+    python host/bench.py                        # усі бенчмарки, 300 кадрів
+    python host/bench.py -n 1000 draw_clock ghost_look  # вибрані
+    python host/bench.py --save base.json       # зберегти baseline
+    python host/bench.py --baseline base.json   # порівняти з baseline
+
+Абсолютні числа стосуються CPython, а не RP2040; порівнювати варто
+відносні зміни між версіями коду.
+"""
+
+import os
+import sys
+import json
+import random
+import tracemalloc
+from array import array
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HOST_DIR)
+import emu
+
+_perf = emu._real_perf
+APPS_DIR = os.path.join(emu.ROOT_DIR, "apps")
+
+
+def _app(name):
+    path = os.path.join(APPS_DIR, name)
+    emu.install((path,))
+    emu.alias_package("utils", path)
+    return path
+
+
+# ---------------------------------------------------------------- drivers
+# кожен драйвер вертає функцію run(call), яка нескінченно генерує кадри,
+# викликаючи функцію рендеру як call(fn, *args); підготовка вхідних даних -
+# поза вимірюванням
+
+def drive_draw_rect():
+    _app("rectangular-neo-spectrum")
+    import rectangle_neo_spectr as app
+    inputs = []
+    for _ in range(64):
+        # потужності смуг у Q8 (1/256 dB), як band_engine.compute_q8()
+        bands = array('i', (random.randint(0, 12 * 256) for _ in range(app.NUM_BAND)))
+        inputs.append((random.randint(0, 8), bands))
+
+    def run(call):
+        while True:
+            for level, power in inputs:
+                call(app.draw_rect, level, power)
+    return run
+
+
+def drive_draw_clock():
+    _app("matrix-clock")
+    import clock_6x4 as app
+
+    def run(call):
+        t = 12 * 3600
+        while True:
+            hh, mm, ss = (t // 3600) % 24, (t // 60) % 60, t % 60
+            call(app.draw_clock, hh, mm, ss, app.green, app.red, True)
+            t += 1
+    return run
+
+
+def drive_ghost_look():
+    _app("ghost")
+    import neopixel
+    import ghost_neo
+    ghost = ghost_neo.Ghost(neopixel.NeoPixel(None, ghost_neo.n * ghost_neo.m))
+    direction = ('ahead', 'up', 'down', 'right', 'left')
+    colors = (ghost_neo.red, ghost_neo.blue, ghost_neo.green)
+
+    def run(call):
+        while True:
+            call(ghost.look, random.choice(direction), random.choice(colors), ghost_neo.red)
+    return run
+
+
+def _maze_vertices(app, gen):
+    # фіксований seed: той самий лабіринт незалежно від інших викликів random
+    maze, *_ = gen.build_maze(num_random_hole=8, start_en=False, finish_en=False, seed=1)
+    vertices = {app.coord_to_pix(i, j): (i, j) for i in range(app.n) for j in range(app.m)
+                if (i, j) not in maze}
+    return maze, vertices
+
+
+def drive_light_path():
+    _app("maze")
+    import maze_bfs as app
+    import maze_generator as gen
+    from graph import Graph
+    maze, vertices = _maze_vertices(app, gen)
+    for coord in maze:
+        app.comp.set_background(app.coord_to_pix(*coord), app.brown)
+    graph = Graph(vertices)
+    start = min(vertices)
+    path = graph.dfs_walk_edges(start)
+
+    def run(call):
+        while True:
+            call(app.light_path, path)
+    return run
+
+
+def drive_write_neo():
+    _app("maze")
+    import maze_bfs_bfs as app
+    import maze_generator as gen
+    from graph import Graph
+    maze, vertices = _maze_vertices(app, gen)
+    for coord in maze:
+        app.comp.set_background(app.coord_to_pix(*coord), app.brown)
+    graph = Graph(vertices)
+    keys = sorted(vertices)
+    a, b = keys[0], keys[-1]
+    path_1 = graph.find_path(a, b)
+    path_2 = graph.find_path(b, a)
+    app.comp.put(a, app.color_1)
+    app.comp.put(b, app.color_2)
+
+    def run(call):
+        while True:
+            end_1, end_2 = call(app.write_neo, path_1, path_2)
+            # агенти повертаються на старт
+            app.comp.move(end_1, a, app.color_1)
+            app.comp.move(end_2, b, app.color_2)
+    return run
+
+
+def drive_spiral():
+    _app("spiral")
+    import spiral as app
+    path_l = app.find_path(app.n, app.m, 'left')
+    path_r = app.find_path(app.n, app.m)
+
+    def run(call):
+        color = app.colors[0]
+        while True:
+            color = call(app.main_run, path_l, path_r, app.colors, color)
+    return run
+
+
+BENCHMARKS = {
+    "draw_rect": drive_draw_rect,
+    "draw_clock": drive_draw_clock,
+    "ghost_look": drive_ghost_look,
+    "light_path": drive_light_path,
+    "write_neo": drive_write_neo,
+    "spiral": drive_spiral,
+}
+
+# анімації: один виклик - десятки кадрів, які комітить FrameSched усередині;
+# кадр для них - інтервал між np.write()
+PER_COMMIT = {"light_path", "write_neo", "spiral"}
+
+
+# ---------------------------------------------------------------- measurement
+class FrameProbe:
+    """Кадр - виклик call(fn, ...) або (per_commit) інтервал між np.write(): час, алокації, змінені пікселі."""
+
+    def __init__(self, frames, trace_alloc=False, per_commit=False):
+        self.trace_alloc = trace_alloc
+        self.per_commit = per_commit
+        # масиви на frames кадрів виділені наперед: запис вимірювань не алокує в кадрі
+        self.times = array("d", bytes(8 * frames))
+        self.peaks = array("q", bytes(8 * frames))
+        self.nets = array("q", bytes(8 * frames))
+        self.pixels = array("l", bytes(array("l").itemsize * frames))
+        self.count = 0
+        self._prev = None
+        self._buf = None
+        self._t = None
+        self._mem = None
+
+    def start(self):
+        # рівень пам'яті знімається останнім: алокації самого probe - поза кадром
+        if self.trace_alloc:
+            tracemalloc.reset_peak()
+            self._mem0 = tracemalloc.get_traced_memory()[0]
+        self._t = _perf()
+
+    def call(self, fn, *args):
+        if self.per_commit:
+            return fn(*args)
+        self.start()
+        result = fn(*args)
+        self.finish()
+        return result
+
+    def commit(self, t_us, buf):
+        # commit-hook emu: буфер кадру; для анімацій - ще й межа кадру
+        self._buf = buf
+        if self.per_commit:
+            self.finish()
+            self.start()
+
+    def finish(self):
+        t = _perf()
+        if self.trace_alloc:
+            mem, peak = tracemalloc.get_traced_memory()
+        k = self.count
+        if self.trace_alloc:
+            self.peaks[k] = peak - self._mem0
+            # приріст між однаковими точками сусідніх кадрів - без локальних змінних probe
+            self.nets[k] = mem - (self._mem0 if self._mem is None else self._mem)
+            self._mem = mem
+        self.times[k] = t - self._t
+        # кадр без np.write() (commit() нічого не записав) - 0 змінених пікселів
+        self.pixels[k] = 0 if self._buf is None else self._changed(self._buf)
+        self._buf = None
+        self.count = k + 1
+        if self.count == len(self.times):
+            raise emu.Stop()
+
+    def _changed(self, buf):
+        # окремий метод: попередній кадр звільняється до start()
+        prev = self._prev
+        self._prev = bytes(buf)
+        if prev is None:
+            return len(buf) // 3
+        changed = 0
+        for k in range(0, len(buf), 3):
+            if buf[k] != prev[k] or buf[k + 1] != prev[k + 1] or buf[k + 2] != prev[k + 2]:
+                changed += 1
+        return changed
+
+
+def _pass(run, frames, trace_alloc, per_commit):
+    probe = FrameProbe(frames, trace_alloc, per_commit)
+    emu.commit_hooks.append(probe.commit)
+    emu.limit()
+    if trace_alloc:
+        tracemalloc.start()
+    try:
+        probe.start()
+        run(probe.call)
+    except emu.Stop:
+        pass
+    finally:
+        if trace_alloc:
+            tracemalloc.stop()
+        emu.commit_hooks.remove(probe.commit)
+    return probe
+
+
+WARMUP = 5          # кадрів прогріву перед вимірюванням
+
+
+def _p99(values):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(0.99 * len(s)))]
+
+
+def bench(name, frames=300, seed=0, repeat=5):
+    random.seed(seed)
+    emu.recorder = emu.Recorder(keep=False)
+    run = BENCHMARKS[name]()
+    per_commit = name in PER_COMMIT
+    # прогрів (перший кадр, кеші) - окремо, потім вимірювання часу, потім алокацій
+    w = _pass(run, WARMUP, False, per_commit)
+    t = min((_pass(run, frames, False, per_commit) for _ in range(repeat)),
+            key=lambda probe: _p99(probe.times))
+    a = _pass(run, frames, True, per_commit)
+    return {
+        "frames": len(t.times),
+        "warmup_us": round(1e6 * w.times[0], 1),
+        "mean_us": round(1e6 * sum(t.times) / len(t.times), 1),
+        "p99_us": round(1e6 * _p99(t.times), 1),
+        "alloc_peak_b": round(sum(a.peaks) / len(a.peaks), 1),
+        "alloc_net_b": round(sum(a.nets) / len(a.nets), 1),
+        "pixels": round(sum(t.pixels) / len(t.pixels), 1),
+    }
+
+
+def report(results, baseline=None):
+    cols = ("warmup_us", "mean_us", "p99_us", "alloc_peak_b", "alloc_net_b", "pixels")
+    print("{:<12}".format("bench") + "".join("{:>16}".format(c) for c in cols))
+    for name, r in results.items():
+        line = "{:<12}".format(name)
+        base = (baseline or {}).get(name)
+        for c in cols:
+            cell = "{:.1f}".format(r[c])
+            if base and base.get(c):
+                cell += " ({:+.0f}%)".format(100.0 * (r[c] - base[c]) / base[c])
+            line += "{:>16}".format(cell)
+        print(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Frame-time benchmarks for the LED apps")
+    ap.add_argument("names", nargs="*", help="benchmarks to run: " + ", ".join(BENCHMARKS))
+    ap.add_argument("-n", "--frames", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-r", "--repeat", type=int, default=5, help="timing passes, best p99 wins")
+    ap.add_argument("--save", help="write results to JSON")
+    ap.add_argument("--baseline", help="compare against JSON from --save")
+    args = ap.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            ap.error("unknown benchmark {!r}".format(name))
+
+    results = {name: bench(name, args.frames, args.seed, args.repeat) for name in (args.names or BENCHMARKS)}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
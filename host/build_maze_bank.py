@@ -0,0 +1,93 @@
+# ----------------------------------------------------------------------------
+# Generate a bank of validated mazes for apps/maze (see apps/maze/maze_bank.py)
+# ----------------------------------------------------------------------------
+# Released under the MIT license
+"""
+Генерує лабіринти генератором застосунку (apps/maze/maze_generator.py) в
+емуляторі, перевіряє кожен і записує у бітовий файл банку:
+
+    python host/build_maze_bank.py mazes.bin --count 2000
+    python host/build_maze_bank.py mazes.bin --count 5000 --holes 4 --algorithm kruskal --seed 7
+
+Перевірка: усі прохідні клітинки (з входом і виходом) - одна компонента
+зв'язності, вхід ліворуч і вихід праворуч на рамці. Однакові лабіринти
+пропускаються. Файл копіюється на плату поруч із застосунками лабіринта
+(MAZE_BANK у maze_dfs.py / maze_bfs.py / maze_bfs_bfs.py).
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import emu
+
+MAZE_DIR = os.path.join(emu.ROOT_DIR, "apps", "maze")
+
+
+def connected(grid, n, m):
+    """True, якщо прохідні клітинки n x m (не в grid) - одна компонента (4-сусідство)."""
+    free = {(i, j) for i in range(n) for j in range(m) if (i, j) not in grid}
+    if not free:
+        return False
+    first = next(iter(free))
+    seen = {first}
+    stack = [first]
+    while stack:
+        i, j = stack.pop()
+        for cell in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            if cell in free and cell not in seen:
+                seen.add(cell)
+                stack.append(cell)
+    return len(seen) == len(free)
+
+
+def generate(gen, bank, count, n, m, holes, algorithm, attempts):
+    """До count різних перевірених записів; вертає (записи, відкинуто)."""
+    seen = set()
+    records = []
+    rejected = 0
+    for _ in range(attempts):
+        if len(records) == count:
+            break
+        grid, start, finish = gen.build_maze(n, m, holes, algorithm=algorithm)
+        if start[1] != 0 or finish[1] != m - 1 or not connected(grid, n, m):
+            rejected += 1
+            continue
+        rec = bytes(bank.pack(grid, start, finish, n, m))
+        if rec in seen:
+            continue
+        seen.add(rec)
+        records.append(rec)
+    return records, rejected
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Generate a bit-packed bank of validated mazes")
+    ap.add_argument("output", help="bank file (e.g. mazes.bin)")
+    ap.add_argument("--count", type=int, default=1000, help="number of different mazes")
+    ap.add_argument("-n", type=int, default=None, help="rows (default: lib/panel.py)")
+    ap.add_argument("-m", type=int, default=None, help="columns (default: lib/panel.py)")
+    ap.add_argument("--holes", type=int, default=8, help="num_random_hole of build_maze")
+    ap.add_argument("--algorithm", default="kruskal", choices=("graph", "kruskal"))
+    ap.add_argument("--seed", type=int, default=None, help="random seed (repeatable bank)")
+    args = ap.parse_args()
+
+    emu.install((MAZE_DIR,))
+    emu.alias_package("utils", MAZE_DIR)
+    import maze_generator as gen
+    import maze_bank as bank
+
+    args.n = args.n or gen.n
+    args.m = args.m or gen.m
+    random.seed(args.seed)
+    records, rejected = generate(gen, bank, args.count, args.n, args.m, args.holes,
+                                 args.algorithm, attempts=20 * args.count)
+    total = bank.write_bank(args.output, args.n, args.m, records)
+    print("{}: {} mazes {}x{}, {} bytes each, {} bytes; rejected {}".format(
+        args.output, total, args.n, args.m, bank.record_size(args.n, args.m),
+        os.path.getsize(args.output), rejected))
+    if total < args.count:
+        print("only {} different mazes found in {} attempts".format(total, 20 * args.count))
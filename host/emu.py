@@ -0,0 +1,415 @@
+# ----------------------------------------------------------------------------
+# Headless host emulator for the apps (CPython, Linux/Windows)
+# Stand-ins: machine, neopixel, _thread, time.sleep_ms/ticks_*, utime, uos,
+#            adc_dma, fastfft; asyncio event loop on the virtual clock
+# ----------------------------------------------------------------------------
+# Released under the MIT license
+"""
+Емулятор дозволяє запускати застосунки з apps/ на ПК без плати:
+
+    python host/emu.py apps/maze/maze_bfs.py --frames 300 --record maze.npxf
+
+- віртуальний годинник: time.sleep_ms()/sleep_us() не чекають, а лише
+  зсувають віртуальний час; ticks_ms()/ticks_us() вертають віртуальний час
+  (з переповненням як у MicroPython, TICKS_PERIOD = 2**30);
+- asyncio (lib/aiorun.py) працює на тому ж віртуальному годиннику:
+  цикл подій не блокується у select(), а зсуває годинник до наступної задачі;
+- кожен np.write() записується у Recorder (у пам'ять та/або у файл .npxf)
+  і зсуває годинник на час передачі WS2812 (30 мкс/LED + reset);
+- зупинка: після заданої кількості кадрів або віртуального часу
+  (виключення Stop, яке не перехоплюється `except Exception` у застосунках).
+
+Використання з коду (напр. бенчмарки):
+
+    import emu
+    emu.install()
+    emu.limit(frames=100)
+    ...
+    emu.recorder.frames  # [(t_us, bytes GRB), ...]
+"""
+
+import os
+import sys
+import time
+import struct
+import threading
+
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(HOST_DIR)
+LIB_DIR = os.path.join(ROOT_DIR, "lib")
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD // 2
+
+# WS2812: 24 біти * 1.25 мкс на LED + reset-пауза
+WIRE_US_PER_LED = 30
+WIRE_RESET_US = 80
+
+_real_sleep = time.sleep
+_real_perf = time.perf_counter
+
+
+class Stop(BaseException):
+    """Досягнуто ліміту емуляції (кадри/час). BaseException - щоб не ловилось `except Exception`."""
+
+
+class Reset(BaseException):
+    """Викликано machine.reset()."""
+
+
+# ---------------------------------------------------------------- clock
+class Clock:
+    """Віртуальний годинник у мікросекундах + програмні таймери machine.Timer."""
+
+    def __init__(self):
+        self.us = 0
+        self.timers = []          # [Timer, ...] активні таймери
+        self.limit_us = None
+        self.stopped = False
+        self._lock = threading.RLock()
+        self._firing = False
+
+    def check(self):
+        if self.stopped:
+            raise Stop()
+
+    def advance(self, us):
+        self.check()
+        with self._lock:
+            self.us += int(us)
+            if self.timers and not self._firing:
+                self._fire_timers()
+            if self.limit_us is not None and self.us >= self.limit_us:
+                self.stopped = True
+        # даємо шанс іншим потокам (_thread) - реальна пауза нульова
+        if threading.active_count() > 1:
+            _real_sleep(0)
+        self.check()
+
+    def _fire_timers(self):
+        self._firing = True
+        try:
+            for t in list(self.timers):
+                while t.active and t.deadline <= self.us:
+                    if t.periodic:
+                        t.deadline += t.period_us
+                    else:
+                        t.active = False
+                        self.timers.remove(t)
+                    if t.callback is not None:
+                        t.callback(t)
+        finally:
+            self._firing = False
+
+    # --- MicroPython time API ---
+    def ticks_us(self):
+        self.check()
+        return self.us & TICKS_MAX
+
+    def ticks_ms(self):
+        self.check()
+        return (self.us // 1000) & TICKS_MAX
+
+    def sleep_us(self, us):
+        if us > 0:
+            self.advance(us)
+        else:
+            self.advance(0)
+
+    def sleep_ms(self, ms):
+        self.sleep_us(1000 * ms)
+
+    def sleep(self, s):
+        self.sleep_us(1_000_000 * s)
+
+    def time(self):
+        return self.us / 1_000_000
+
+
+def ticks_diff(t1, t0):
+    return ((t1 - t0 + TICKS_HALF) & TICKS_MAX) - TICKS_HALF
+
+
+def ticks_add(t, delta):
+    return (t + delta) & TICKS_MAX
+
+
+# ---------------------------------------------------------------- recorder
+class Recorder:
+    """
+    Записує кожен закомічений кадр (np.write()).
+    keep=True   - кадри зберігаються у self.frames як (t_us, bytes GRB)
+    path        - додатково пише у файл формату .npxf:
+                  заголовок b'NPXF' + u16 кількість LED,
+                  кадр: u32 t_us + 3 * num_leds байт GRB
+    """
+
+    MAGIC = b"NPXF"
+
+    def __init__(self, path=None, keep=True):
+        self.keep = keep
+        self.frames = []
+        self.count = 0
+        self.max_frames = None
+        self._file = None
+        self._num_leds = None
+        self.path = path
+
+    def record(self, t_us, buf):
+        num_leds = len(buf) // 3
+        if self.path is not None and self._file is None:
+            self._file = open(self.path, "wb")
+            self._file.write(self.MAGIC + struct.pack("<H", num_leds))
+            self._num_leds = num_leds
+        if self.keep:
+            self.frames.append((t_us, bytes(buf)))
+        if self._file is not None and num_leds == self._num_leds:
+            self._file.write(struct.pack("<I", t_us & 0xFFFFFFFF))
+            self._file.write(buf)
+        self.count += 1
+        if self.max_frames is not None and self.count >= self.max_frames:
+            clock.stopped = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load(cls, path):
+        """Читає файл .npxf, вертає список (t_us, bytes GRB)."""
+        frames = []
+        with open(path, "rb") as f:
+            head = f.read(6)
+            if head[:4] != cls.MAGIC:
+                raise ValueError("not a .npxf file")
+            size = 3 * struct.unpack("<H", head[4:])[0]
+            while True:
+                t = f.read(4)
+                data = f.read(size)
+                if len(t) < 4 or len(data) < size:
+                    break
+                frames.append((struct.unpack("<I", t)[0], data))
+        return frames
+
+
+# ---------------------------------------------------------------- peripherals models
+class DS3231Model:
+    """Модель RTC DS3231 на шині I2C: час = старт (час ПК) + віртуальний годинник."""
+
+    def __init__(self, start=None):
+        self.start = time.time() if start is None else start
+        self.offset_us = 0
+
+    @staticmethod
+    def _bcd(d):
+        return ((d // 10) << 4) | (d % 10)
+
+    @staticmethod
+    def _dec(b):
+        return (b >> 4) * 10 + (b & 0x0F)
+
+    def readfrom_mem(self, reg, nbytes):
+        t = time.localtime(int(self.start + (clock.us + self.offset_us) / 1_000_000))
+        regs = bytes((self._bcd(t.tm_sec), self._bcd(t.tm_min), self._bcd(t.tm_hour),
+                      self._bcd(t.tm_wday), self._bcd(t.tm_mday), self._bcd(t.tm_mon),
+                      self._bcd(t.tm_year - 2000)))
+        return regs[reg:reg + nbytes]
+
+    def writeto_mem(self, reg, buf):
+        if reg == 0 and len(buf) >= 7:
+            d = self._dec
+            dt = (d(buf[6]) + 2000, d(buf[5]), d(buf[4]), d(buf[2]), d(buf[1]), d(buf[0]), 0, 0, -1)
+            now = self.start + clock.us / 1_000_000
+            self.offset_us = int((time.mktime(dt) - now) * 1_000_000)
+
+
+clock = Clock()
+recorder = Recorder()
+i2c_devices = {0x68: DS3231Model()}
+# джерело семплів для adc_dma: callable(channel, sample_freq, n, t_us) -> iterable of int (0..4095)
+adc_source = None
+# callable(t_us, buf) для кожного кадру (напр. вимірювання у bench.py)
+commit_hooks = []
+
+
+def limit(frames=None, ms=None):
+    """Зупинка емуляції після frames кадрів та/або ms мс віртуального часу."""
+    recorder.max_frames = None if frames is None else recorder.count + frames
+    clock.limit_us = None if ms is None else clock.us + 1000 * ms
+    clock.stopped = False
+
+
+def commit(np):
+    """Викликається з neopixel.NeoPixel.write()."""
+    clock.check()
+    for hook in commit_hooks:
+        hook(clock.us, np.buf)
+    recorder.record(clock.us, np.buf)
+    clock.advance(WIRE_US_PER_LED * (len(np.buf) // 3) + WIRE_RESET_US)
+
+
+# ---------------------------------------------------------------- asyncio
+class _VirtualSelector:
+    """Селектор циклу подій asyncio: замість очікування у select() зсуває віртуальний годинник."""
+
+    IDLE_US = 1000   # крок часу, коли задачі чекають лише на події (ThreadSafeFlag)
+
+    def __init__(self, selector):
+        self._selector = selector
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if clock.stopped:
+            # після Stop asyncio.run() лише скасовує задачі - час не зсуваємо
+            return events
+        if not events:
+            if timeout is None:
+                clock.advance(self.IDLE_US)
+            elif timeout > 0:
+                clock.advance(-(-timeout * 1_000_000 // 1))
+            else:
+                clock.check()
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+def new_event_loop():
+    """Цикл подій asyncio з часом віртуального годинника."""
+    import asyncio
+    import selectors
+    loop = asyncio.SelectorEventLoop(_VirtualSelector(selectors.DefaultSelector()))
+    loop.time = lambda: clock.us / 1_000_000
+    return loop
+
+
+def _virtual_policy():
+    import asyncio
+
+    class VirtualPolicy(asyncio.DefaultEventLoopPolicy):
+        def new_event_loop(self):
+            return new_event_loop()
+    return VirtualPolicy()
+
+
+# ---------------------------------------------------------------- install
+_installed = False
+_saved_thread = None
+_saved_policy = None
+
+
+def _load_host_module(name):
+    # вбудовані модулі CPython (_thread) мають пріоритет над sys.path - вантажимо явно
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HOST_DIR, name + ".py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def install(paths=()):
+    """
+    Підміняє MicroPython-модулі: додає host/ та lib/ до sys.path,
+    доповнює модуль time функціями MicroPython, реєструє utime/uos,
+    asyncio.run() отримує цикл подій на віртуальному годиннику.
+    paths - додаткові каталоги (каталог застосунку).
+    """
+    global _installed, _saved_thread, _saved_policy
+    for p in reversed((HOST_DIR, LIB_DIR) + tuple(paths)):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+    if not _installed:
+        time.sleep = clock.sleep
+        time.sleep_ms = clock.sleep_ms
+        time.sleep_us = clock.sleep_us
+        time.ticks_ms = clock.ticks_ms
+        time.ticks_us = clock.ticks_us
+        time.ticks_cpu = clock.ticks_us
+        time.ticks_diff = ticks_diff
+        time.ticks_add = ticks_add
+        sys.modules["utime"] = time
+        sys.modules["uos"] = os
+        _saved_thread = sys.modules.get("_thread")
+        sys.modules["_thread"] = _load_host_module("_thread")
+        import asyncio
+        _saved_policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(_virtual_policy())
+        _installed = True
+
+
+def uninstall():
+    global _installed
+    if _installed:
+        time.sleep = _real_sleep
+        for name in ("sleep_ms", "sleep_us", "ticks_ms", "ticks_us", "ticks_cpu",
+                     "ticks_diff", "ticks_add"):
+            delattr(time, name)
+        sys.modules.pop("utime", None)
+        sys.modules.pop("uos", None)
+        sys.modules["_thread"] = _saved_thread
+        import asyncio
+        asyncio.set_event_loop_policy(_saved_policy)
+        _installed = False
+
+
+def alias_package(name, path):
+    """Реєструє пакет name з каталогу path (на платі graph.py імпортує utils.graph_utils)."""
+    import types
+    pkg = sys.modules.get(name)
+    if pkg is None:
+        pkg = types.ModuleType(name)
+        pkg.__path__ = []
+        sys.modules[name] = pkg
+    if path not in pkg.__path__:
+        pkg.__path__.append(path)
+    return pkg
+
+
+def run_app(path, frames=None, ms=None, record=None, keep=False):
+    """Запускає файл застосунку як __main__ до ліміту; вертає recorder."""
+    import runpy
+    global recorder
+    app_dir = os.path.dirname(os.path.abspath(path))
+    install((app_dir,))
+    alias_package("utils", app_dir)
+    alias_package("utils", LIB_DIR)
+    recorder = Recorder(record, keep)
+    limit(frames, ms)
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except Stop:
+        pass
+    finally:
+        recorder.close()
+        clock.stopped = True   # зупиняємо потоки _thread застосунку
+    return recorder
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run a MicroPython LED app on the host")
+    ap.add_argument("app", help="path to app .py file")
+    ap.add_argument("--frames", type=int, default=200, help="stop after N committed frames")
+    ap.add_argument("--ms", type=int, default=None, help="stop after N ms of virtual time")
+    ap.add_argument("--record", default=None, help="write frames to .npxf file")
+    ap.add_argument("--adc-file", default=None, help="replay ADC samples from a WAV file")
+    args = ap.parse_args()
+
+    # заглушки імпортують `emu`, тож працюємо через модуль, а не через __main__
+    sys.path.insert(0, HOST_DIR)
+    import emu
+    if args.adc_file:
+        import adc_dma
+        emu.adc_source = adc_dma.replay(args.adc_file)
+
+    t0 = _real_perf()
+    rec = emu.run_app(args.app, args.frames, args.ms, args.record)
+    dt = _real_perf() - t0
+    print("frames: {}  virtual time: {:.3f} s  real time: {:.3f} s".format(
+        rec.count, emu.clock.us / 1_000_000, dt))
@@ -0,0 +1,82 @@
+# fastfft.py - host stand-in for the `fastfft` C-module (see emu.py)
+# rfft(buf, window) -> memoryview на внутрішній буфер енергій бінів
+# spec[k] = |X[k]|**2 / N**2, k = 0 .. N/2 - 1 (вікно Ханна при window=True).
+# Як і C-модуль, наступний виклик перезаписує той самий буфер.
+# Виклик займає віртуальний час за моделлю RP2040 (N log2 N, 35 мс для N = 1024),
+# щоб на ПК було видно, як FFT перекривається із захватом ADC.
+import math
+from array import array
+import emu
+
+# час rfft (з вікном) на RP2040 для N = 1024, мкс (README спектра: T_fft ≈ 35 мс)
+T_FFT_1024_US = 35_000
+
+_out = {}      # N -> array('f')
+_hann = {}     # N -> tuple
+
+
+def _window(n):
+    w = _hann.get(n)
+    if w is None:
+        w = tuple(0.5 - 0.5 * math.cos(2 * math.pi * k / (n - 1)) for k in range(n))
+        _hann[n] = w
+    return w
+
+
+def fft(re, im):
+    """Ітеративне radix-2 FFT на місці (списки float), довжина - степінь 2."""
+    n = len(re)
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            re[i], re[j] = re[j], re[i]
+            im[i], im[j] = im[j], im[i]
+    size = 2
+    while size <= n:
+        half = size // 2
+        ang = -2 * math.pi / size
+        for k in range(half):
+            wr = math.cos(ang * k)
+            wi = math.sin(ang * k)
+            for start in range(k, n, size):
+                a = start
+                b = start + half
+                tr = wr * re[b] - wi * im[b]
+                ti = wr * im[b] + wi * re[b]
+                re[b] = re[a] - tr
+                im[b] = im[a] - ti
+                re[a] += tr
+                im[a] += ti
+        size <<= 1
+
+
+def cost_us(n):
+    """Модельний час rfft розміру n на RP2040, мкс."""
+    return T_FFT_1024_US * n * int(math.log2(n)) // (1024 * 10)
+
+
+def rfft(buf, window=False):
+    n = len(buf)
+    if n & (n - 1):
+        raise ValueError("FFT size must be a power of 2")
+    emu.clock.advance(cost_us(n))
+    if window:
+        w = _window(n)
+        re = [buf[k] * w[k] for k in range(n)]
+    else:
+        re = [float(x) for x in buf]
+    im = [0.0] * n
+    fft(re, im)
+    out = _out.get(n)
+    if out is None:
+        out = array('f', bytes(4 * (n // 2)))
+        _out[n] = out
+    scale = 1.0 / (n * n)
+    for k in range(n // 2):
+        out[k] = (re[k] * re[k] + im[k] * im[k]) * scale
+    return memoryview(out)
@@ -0,0 +1,37 @@
+# ----------------------------------------------------------------------------
+# Freeze app sprite tables into an importable .py module (see lib/sprite.py)
+# ----------------------------------------------------------------------------
+# Released under the MIT license
+"""
+Імпортує модуль застосунку в емуляторі і записує його SPRITES
+у файл SPRITES_MODULE.py поруч із ним:
+
+    python host/freeze_sprites.py apps/ghost/ghost_neo.py
+    python host/freeze_sprites.py apps/matrix-clock/clock_6x4.py
+
+Отриманий файл копіюється на плату разом із застосунком
+(за бажанням - скомпільований mpy-cross у .mpy).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import emu
+
+
+def freeze_app(path):
+    app_dir = os.path.dirname(os.path.abspath(path))
+    name = os.path.splitext(os.path.basename(path))[0]
+    emu.install((app_dir,))
+    import sprite
+    mod = __import__(name)
+    out = os.path.join(app_dir, mod.SPRITES_MODULE + ".py")
+    sprite.freeze(out, mod.SPRITES)
+    return out, len(mod.SPRITES)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        out, count = freeze_app(path)
+        print("{}: {} sprites".format(out, count))
@@ -0,0 +1,158 @@
+# machine.py - host stand-in for the MicroPython `machine` module (see emu.py)
+import emu
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    # id -> Pin, щоб емулятор міг "натискати" кнопки: Pin.get(15).press()
+    _pins = {}
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self._value = 1 if value else 0
+        self._handler = None
+        self._trigger = 0
+        Pin._pins[id] = self
+
+    @classmethod
+    def get(cls, id):
+        return cls._pins.get(id)
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._set(1 if v else 0)
+
+    __call__ = value
+
+    def on(self):
+        self._set(1)
+
+    def off(self):
+        self._set(0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self._handler = handler
+        self._trigger = trigger
+
+    def _set(self, v):
+        old, self._value = self._value, v
+        if self._handler is not None and old != v:
+            if (v == 0 and self._trigger & Pin.IRQ_FALLING) or (v == 1 and self._trigger & Pin.IRQ_RISING):
+                self._handler(self)
+
+    def press(self, ms=100):
+        """Натискання кнопки з PULL_UP: 0 на ms мс віртуального часу, потім 1."""
+        self._set(0)
+        emu.clock.sleep_ms(ms)
+        self._set(1)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self.active = False
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None):
+        self.deinit()
+        self.periodic = mode == Timer.PERIODIC
+        self.period_us = int(1_000_000 / freq) if freq > 0 else 1000 * period
+        self.callback = callback
+        self.deadline = emu.clock.us + self.period_us
+        self.active = True
+        emu.clock.timers.append(self)
+
+    def deinit(self):
+        if self.active:
+            self.active = False
+            emu.clock.timers.remove(self)
+
+
+class UART:
+    """UART без підключеного пристрою; rx можна наповнити через feed()."""
+
+    def __init__(self, id, baudrate=115200, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.rx = bytearray()
+        self.tx = bytearray()
+
+    def init(self, baudrate=115200, **kwargs):
+        self.baudrate = baudrate
+
+    def feed(self, data):
+        self.rx.extend(data)
+
+    def any(self):
+        return len(self.rx)
+
+    def read(self, nbytes=None):
+        if not self.rx:
+            return None
+        if nbytes is None or nbytes >= len(self.rx):
+            data, self.rx = bytes(self.rx), bytearray()
+        else:
+            data, self.rx = bytes(self.rx[:nbytes]), self.rx[nbytes:]
+        return data
+
+    def readinto(self, buf, nbytes=None):
+        data = self.read(len(buf) if nbytes is None else nbytes)
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def write(self, buf):
+        self.tx.extend(buf)
+        return len(buf)
+
+
+class I2C:
+    """I2C шина; пристрої - моделі з emu.i2c_devices (адреса -> модель)."""
+
+    def __init__(self, id, sda=None, scl=None, freq=400000):
+        self.id = id
+        self.freq = freq
+
+    def scan(self):
+        return sorted(emu.i2c_devices)
+
+    def _dev(self, addr):
+        dev = emu.i2c_devices.get(addr)
+        if dev is None:
+            raise OSError(19)  # ENODEV, як у MicroPython
+        return dev
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        return self._dev(addr).readfrom_mem(memaddr, nbytes)
+
+    def writeto_mem(self, addr, memaddr, buf):
+        self._dev(addr).writeto_mem(memaddr, buf)
+
+
+def reset():
+    raise emu.Reset()
+
+
+def soft_reset():
+    raise emu.Reset()
+
+
+def freq(hz=None):
+    return 125_000_000
@@ -0,0 +1,328 @@
+# ----------------------------------------------------------------------------
+# Offline replay of recorded audio through the spectrum DSP/AGC/render chain
+# ----------------------------------------------------------------------------
+# Released under the MIT license
+"""
+Проганяє запис (WAV або сирі i16-буфери) через ланцюг індикатора спектра
+(apps/rectangular-neo-spectrum) на ПК з максимальною швидкістю, без
+віртуального часу захвату і без другого "ядра":
+
+    кадр семплів -> Decimator / Stft -> FFT -> build_band_spectr (dB)
+                 -> compute_q8 -> build_peak_level -> draw_rect -> np.write()
+
+    python host/replay.py rec.wav --levels base.csv
+    python host/replay.py rec.wav --set "NOISE_THRESHOLD=(64, 70, 75, 78, 73, 70, 70, 69)" \\
+                                  --check base.csv --record tuned.npxf
+    python host/replay.py buffers.i16 --rate 44100 --set STFT_HOP=None
+
+- FFT: NumPy (вікно Ханна, |X[k]|**2 / N**2 - як fastfft.rfft) або, якщо
+  NumPy немає, host/fastfft.py на чистому Python;
+- --set NAME=EXPR підміняє присвоєння верхнього рівня в модулі застосунку
+  або в lib/panel.py (n, m, tile, tiles, serpentine) до їх виконання, тож
+  похідні таблиці (геометрія, band_engine, Q8-константи AGC, Decimator,
+  Stft) будуються з нових значень;
+- --levels пише CSV (кадр, час, рівень, dB смуг з build_band_spectr),
+  --check порівнює з таким CSV (код виходу 1, якщо рівні відрізняються),
+  --record пише закомічені кадри у .npxf (emu.Recorder);
+- --rate - частота семплів входу: для сирих i16 (за замовчуванням
+  SAMPLE_FREQ), для WAV - замість частоти із заголовка; вхід перевибирається
+  до SAMPLE_FREQ найближчим семплом;
+- звіт: час кожного етапу (mean / p99, мкс, реальний час CPython) і кадрів/с.
+
+STFT_HOP = 'auto' вимірює ціну FFT при імпорті - тут за моделлю RP2040
+(fastfft.cost_us), тож крок той самий, що й в емуляторі.
+"""
+
+import os
+import sys
+import ast
+import csv
+import types
+import wave
+from array import array
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HOST_DIR)
+
+import emu
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+APP_PATH = os.path.join(emu.ROOT_DIR, "apps", "rectangular-neo-spectrum", "rectangle_neo_spectr.py")
+STAGES = ("front", "fft", "bands", "agc", "render")
+
+_perf = emu._real_perf
+
+
+# ---------------------------------------------------------------- reference FFT
+def _reference_fastfft():
+    """Модуль fastfft для застосунку: NumPy-FFT або host/fastfft.py, ціна - модель RP2040."""
+    host_fft = emu._load_host_module("fastfft")
+    mod = types.ModuleType("fastfft")
+    mod.cost_us = host_fft.cost_us
+    cache = {}
+
+    if numpy is not None:
+        def rfft(buf, window=False):
+            n = len(buf)
+            emu.clock.advance(host_fft.cost_us(n))
+            x = numpy.frombuffer(buf, dtype=numpy.int16).astype(numpy.float64)
+            if window:
+                w = cache.get(n)
+                if w is None:
+                    w = 0.5 - 0.5 * numpy.cos(2 * numpy.pi * numpy.arange(n) / (n - 1))
+                    cache[n] = w
+                x = x * w
+            p = numpy.abs(numpy.fft.rfft(x)[:n // 2]) ** 2 / (n * n)
+            return memoryview(array('f', p.astype(numpy.float32).tobytes()))
+    else:
+        rfft = host_fft.rfft
+    mod.rfft = rfft
+    mod.backend = "numpy" if numpy is not None else "python"
+    return mod
+
+
+# ---------------------------------------------------------------- app with overrides
+def _parse(path, left):
+    """AST модуля path з підміненими присвоєннями верхнього рівня; підмінені імена зникають з left."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in left:
+                    node.value = ast.parse(left.pop(target.id), mode="eval").body
+    return ast.fix_missing_locations(tree)
+
+
+def _exec_module(name, path, tree):
+    mod = types.ModuleType(name)
+    mod.__file__ = path
+    sys.modules[name] = mod
+    exec(compile(tree, path, "exec"), mod.__dict__)
+    return mod
+
+
+def load_app(overrides=None):
+    """
+    Виконує модуль застосунку (не як __main__), підміняючи значення присвоєнь
+    верхнього рівня з overrides {NAME: "вираз"}; імена, яких немає в
+    застосунку, підміняються у lib/panel.py (розмір і геометрія панелі).
+    """
+    app_dir = os.path.dirname(APP_PATH)
+    emu.install((app_dir,))
+    sys.modules["fastfft"] = _reference_fastfft()
+    left = dict(overrides or {})
+    tree = _parse(APP_PATH, left)
+    panel_path = os.path.join(emu.LIB_DIR, "panel.py")
+    panel_tree = _parse(panel_path, left)
+    if left:
+        raise ValueError("no top-level assignment for: " + ", ".join(sorted(left)))
+    _exec_module("panel", panel_path, panel_tree)
+    return _exec_module("rectangle_neo_spectr", APP_PATH, tree)
+
+
+# ---------------------------------------------------------------- input
+def resample(samples, src_rate, rate):
+    """Перевибірка src_rate -> rate найближчим семплом; тип послідовності зберігається."""
+    if src_rate == rate:
+        return samples
+    size = int(len(samples) * rate / src_rate)
+    last = len(samples) - 1
+    idx = (min(last, int(k * src_rate / rate)) for k in range(size))
+    if isinstance(samples, array):
+        return array(samples.typecode, (samples[i] for i in idx))
+    return [samples[i] for i in idx]
+
+
+def read_wav(path, rate, src_rate=None):
+    """
+    Семпли WAV (канал 0) як 12-бітний ADC (DC = 2048), перевибірка до rate найближчим семплом.
+    src_rate - частота запису замість вказаної в заголовку WAV (None - із заголовка).
+    """
+    with wave.open(path, "rb") as f:
+        src_rate = src_rate or f.getframerate()
+        width = f.getsampwidth()
+        channels = f.getnchannels()
+        raw = f.readframes(f.getnframes())
+    if width == 2:
+        pcm = [2048 + (s >> 4) for s in array('h', raw)[::channels]]
+    elif width == 1:
+        pcm = [b << 4 for b in raw[::channels]]
+    else:
+        raise ValueError("unsupported WAV sample width: {}".format(width))
+    return resample(pcm, src_rate, rate)
+
+
+def read_i16(path):
+    """Сирі буфери i16 (little-endian), як вертає adc_dma.buffer_i16(): без перетворення ADC."""
+    data = array('h')
+    with open(path, "rb") as f:
+        data.frombytes(f.read())
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+def adc_block(pcm, start, n):
+    """Блок 12-бітних семплів -> i16 як adc_dma.buffer_i16('auto'): мінус DC, x16."""
+    block = pcm[start:start + n]
+    dc = sum(block) // n
+    return array('h', (max(-32768, min(32767, (s - dc) << 4)) for s in block))
+
+
+# ---------------------------------------------------------------- replay
+class StageTimer:
+
+    def __init__(self):
+        self.times = {name: [] for name in STAGES}
+
+    def report(self, frames, total_s):
+        print("{:<8}{:>12}{:>12}".format("stage", "mean_us", "p99_us"))
+        for name in STAGES:
+            t = sorted(self.times[name])
+            if not t:
+                continue
+            mean = 1e6 * sum(t) / len(t)
+            p99 = 1e6 * t[min(len(t) - 1, int(0.99 * len(t)))]
+            print("{:<8}{:>12.1f}{:>12.1f}".format(name, mean, p99))
+        print("frames: {}  real time: {:.3f} s  {:.0f} frames/s".format(
+            frames, total_s, frames / total_s if total_s else 0.0))
+
+
+def replay(app, samples, is_adc=True, frames=None):
+    """
+    Ганяє samples через ланцюг застосунку; вертає (рядки рівнів, StageTimer).
+    Рядок: (кадр, час мс від початку запису, рівень, dB смуг...).
+    Банк Герцеля по блоках (app.stream) дає рядок на завершений кадр; front/fft
+    такого кадру - сума по всіх його блоках.
+    """
+    stft = app.stft
+    stream = app.stream
+    if stream is not None:
+        block = stream.block
+    elif stft is None:
+        block = app.front.n_in
+    else:
+        block = stft.hop
+    timer = StageTimer()
+    times = timer.times
+    rows = []
+    k = 0
+    start = 0
+    t_front = t_fft = 0.0
+    while start + block <= len(samples) and (frames is None or k < frames):
+        buf = adc_block(samples, start, block) if is_adc else memoryview(samples)[start:start + block]
+        start += block
+        t0 = _perf()
+        if stream is not None:
+            x = stream.push(buf)
+        elif stft is None:
+            x = app.front.process(buf)
+        else:
+            stft.push(buf)
+            x = stft.frame()
+        t1 = _perf()
+        spectr = app.analyse(x)
+        t2 = _perf()
+        t_front += t1 - t0
+        t_fft += t2 - t1
+        if spectr is None:
+            continue
+        band_q8 = app.band_engine.compute_q8(spectr)
+        t3 = _perf()
+        level = app.build_peak_level(app.band_sum(band_q8))
+        t4 = _perf()
+        app.draw_rect(level, band_q8)
+        t5 = _perf()
+        times["front"].append(t_front)
+        times["fft"].append(t_fft)
+        t_front = t_fft = 0.0
+        times["bands"].append(t3 - t2)
+        times["agc"].append(t4 - t3)
+        times["render"].append(t5 - t4)
+        # dB смуг для налаштування порогів (поза вимірюванням етапів)
+        band_db = app.build_band_spectr(spectr)
+        t_ms = 1000.0 * start / app.SAMPLE_FREQ
+        rows.append((k, round(t_ms, 2), level) + tuple(round(v, 2) for v in band_db))
+        k += 1
+    return rows, timer
+
+
+def write_levels(path, rows, num_band):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(("frame", "t_ms", "level") + tuple("band{}_db".format(b) for b in range(num_band)))
+        w.writerows(rows)
+
+
+def check_levels(path, rows):
+    """Порівняння з CSV від --levels: (кадрів з іншим рівнем, макс. різниця dB смуг)."""
+    with open(path, newline="") as f:
+        ref = list(csv.reader(f))[1:]
+    if len(ref) != len(rows):
+        print("frame count differs: {} vs {}".format(len(rows), len(ref)))
+    diff_level = 0
+    diff_db = 0.0
+    for row, r in zip(rows, ref):
+        if int(r[2]) != row[2]:
+            diff_level += 1
+        for a, b in zip(row[3:], r[3:]):
+            diff_db = max(diff_db, abs(a - float(b)))
+    return diff_level + abs(len(ref) - len(rows)), diff_db
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Replay recorded audio through the spectrum DSP/AGC/render chain")
+    ap.add_argument("input", help="WAV file or raw little-endian i16 buffers (.i16/.raw)")
+    ap.add_argument("--rate", type=int, default=None, help="input sample rate: raw i16 (default SAMPLE_FREQ) or WAV header override; "
+                         "resampled to SAMPLE_FREQ")
+    ap.add_argument("--frames", type=int, default=None, help="stop after N analysis frames")
+    ap.add_argument("--set", action="append", default=[], metavar="NAME=EXPR",
+                    help="override a top-level constant of the app (repeatable)")
+    ap.add_argument("--levels", help="write levels and band dB to CSV")
+    ap.add_argument("--check", help="compare levels with CSV from --levels, exit 1 on difference")
+    ap.add_argument("--record", help="write committed frames to .npxf")
+    args = ap.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        name, sep, expr = item.partition("=")
+        if not sep:
+            ap.error("--set expects NAME=EXPR, got {!r}".format(item))
+        overrides[name.strip()] = expr
+    emu.recorder = emu.Recorder(args.record, keep=False)
+    app = load_app(overrides)
+
+    if args.input.lower().endswith(".wav"):
+        samples = read_wav(args.input, app.SAMPLE_FREQ, args.rate)
+        is_adc = True
+    else:
+        samples = resample(read_i16(args.input), args.rate or app.SAMPLE_FREQ, app.SAMPLE_FREQ)
+        is_adc = False
+
+    print("fft: {}  decimation: {}  hop: {}  fft size: {}".format(
+        sys.modules["fastfft"].backend, app.DECIMATION,
+        app.stft.hop if app.stft is not None else None, app.N_FFT))
+    t0 = _perf()
+    rows, timer = replay(app, samples, is_adc, args.frames)
+    total = _perf() - t0
+    emu.recorder.close()
+    timer.report(len(rows), total)
+    if rows:
+        hist = [0] * (app.NUM_LEVEL + 1)
+        for row in rows:
+            hist[row[2]] += 1
+        print("levels 0..{}: ".format(app.NUM_LEVEL) + " ".join(str(c) for c in hist))
+    if args.levels:
+        write_levels(args.levels, rows, app.NUM_BAND)
+    if args.check:
+        bad, db = check_levels(args.check, rows)
+        print("check: {} frames with different level, max band difference {:.2f} dB".format(bad, db))
+        if bad:
+            sys.exit(1)
@@ -0,0 +1,121 @@
+# aiorun.py
+# Кооперативний рантайм застосунків на asyncio/uasyncio
+# Released under the MIT license
+"""
+Рендер, сенсор LD2410, RTC DS3231 та кнопка switcher - задачі asyncio
+в одному потоці з очікуванням через await замість опитування у циклі
+та другого ядра (_thread):
+
+    import aiorun
+
+    async def render():
+        sched.start()
+        while True:
+            if await aiorun.due(sched):
+                ghost.look(...)
+
+    aiorun.run(render(), aiorun.ld2410_task(sensor, on_report), switcher.serve())
+
+На платі використовується uasyncio (MicroPython), на ПК - asyncio CPython
+(host/emu.py підставляє цикл подій з віртуальним часом).
+"""
+
+import sys
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+_MICROPYTHON = sys.implementation.name == 'micropython'
+
+
+if hasattr(asyncio, 'sleep_ms'):
+    sleep_ms = asyncio.sleep_ms
+else:
+    def sleep_ms(ms):
+        return asyncio.sleep(ms / 1000)
+
+
+if hasattr(asyncio, 'ThreadSafeFlag'):
+    ThreadSafeFlag = asyncio.ThreadSafeFlag
+else:
+    class ThreadSafeFlag:
+        '''CPython: прапорець, який можна ставити з обробника IRQ (іншого потоку)'''
+
+        def __init__(self):
+            self._event = asyncio.Event()
+            self._loop = None
+
+        def set(self):
+            if self._loop is None:
+                self._event.set()
+            else:
+                self._loop.call_soon_threadsafe(self._event.set)
+
+        async def wait(self):
+            self._loop = asyncio.get_running_loop()
+            await self._event.wait()
+            self._event.clear()
+
+
+async def due(sched):
+    '''
+    асинхронний FrameScheduler.due(): поки до дедлайну кадру >= 1 мс,
+    інші задачі виконуються; True - кадр відправляти зараз
+    '''
+    us = sched.until_us()
+    if us >= 1000:
+        await sleep_ms(us // 1000)
+    return sched.due()
+
+
+async def ld2410_task(sensor, on_report, poll_ms=50, frame_len=23):
+    '''
+    читає report-кадри LD2410 лише коли у буфері UART вже є цілий кадр
+    (сенсор шле ~10 кадрів/с), on_report(meas) - для кожного розібраного кадру
+    '''
+    uart = sensor.uart
+    while True:
+        try:
+            if uart.any() >= frame_len:
+                meas = sensor.read_report(print_hex=False)
+                if meas is not None:
+                    on_report(meas)
+                await sleep_ms(0)
+            else:
+                await sleep_ms(poll_ms)
+        except Exception:
+            # будь-яка апаратна/протокольна аномалія -> задача не зупиняється
+            await sleep_ms(200)
+
+
+async def rtc_task(rtc, on_tick, poll_ms=10, margin_ms=30):
+    '''
+    викликає on_tick(datetime) на кожній новій секунді RTC.
+    Після зміни секунди задача спить майже секунду і лише біля межі
+    опитує RTC кожні poll_ms (~3 читання I2C за секунду замість 50)
+    '''
+    last = None
+    while True:
+        t = rtc.datetime()
+        if t[6] != last:
+            last = t[6]
+            on_tick(t)
+            await sleep_ms(1000 - margin_ms)
+        else:
+            await sleep_ms(poll_ms)
+
+
+async def _main(coros):
+    tasks = [asyncio.create_task(c) for c in coros]
+    await asyncio.gather(*tasks)
+
+
+def run(*coros):
+    '''запускає задачі і виконує цикл подій (на платі - до reset)'''
+    try:
+        asyncio.run(_main(coros))
+    finally:
+        if _MICROPYTHON:
+            asyncio.new_event_loop()  # скидає стан uasyncio перед наступним запуском
@@ -0,0 +1,135 @@
+# frame_sched.py
+# Планувальник кадрів: відправка кадрів за дедлайнами із заданою частотою
+# Released under the MIT license
+"""
+Замість `pix.write(); time.sleep_ms(speed)` (реальний період = speed +
+обчислення + передача WS2812 ~8 мс, і він "пливе" з розміром лабіринту/шляху)
+кадри відправляються за дедлайнами, що йдуть рівно через 1/fps:
+
+    sched = FrameScheduler(fps=10)
+    sched.start()
+    for a, b in path:
+        comp.move(a, b, color)    # оновлення стану/буфера
+        if sched.due():           # чекає лише до дедлайну кадру
+            comp.commit(pix)      # або pix.write()
+
+due() спить до наступного дедлайну (обчислення кадру входять у період).
+Якщо цикл відстає на період і більше, кадр не відправляється (False):
+зміни зливаються з наступним кадром, а анімація не "доганяє" серією кадрів.
+Після max_drop пропусків поспіль кадр відправляється і розклад
+синхронізується з поточним часом.
+
+Статистика (мкс): stats() - відправлені/пропущені кадри, запізнення, джитер.
+"""
+
+import time
+
+
+class FrameScheduler:
+
+    def __init__(self, fps=None, period_ms=None, max_drop=4):
+        if period_ms is not None:
+            self.set_period_ms(period_ms)
+        else:
+            self.set_fps(fps)
+        self.max_drop = max_drop
+        self.deadline = None
+        self._run = 0          # пропущені кадри поспіль
+        self.reset_stats()
+
+    def set_fps(self, fps):
+        self.period_us = int(1_000_000 / fps)
+
+    def set_period_ms(self, ms):
+        self.period_us = int(1000 * ms)
+
+    def reset_stats(self):
+        self.frames = 0        # відправлені кадри
+        self.dropped = 0       # злиті з наступним кадром
+        self.overruns = 0      # кадри, готові вже після дедлайну
+        self.resyncs = 0       # синхронізації розкладу після max_drop пропусків
+        self.max_late_us = 0
+        self.jitter_sum_us = 0
+        self.jitter_max_us = 0
+
+    def start(self):
+        '''перший кадр - одразу; викликати на початку анімації (після пауз)'''
+        self.deadline = time.ticks_us()
+        self._run = 0
+
+    def until_us(self):
+        '''мкс до дедлайну поточного кадру (0 - вже час); для асинхронного очікування'''
+        if self.deadline is None:
+            return 0
+        return max(0, time.ticks_diff(self.deadline, time.ticks_us()))
+
+    def due(self):
+        '''
+        чекає до дедлайну поточного кадру;
+        True - кадр відправляти зараз, False - кадр злито з наступним
+        '''
+        if self.deadline is None:
+            self.start()
+        late = time.ticks_diff(time.ticks_us(), self.deadline)
+        if late < 0:
+            time.sleep_us(-late)
+            late = time.ticks_diff(time.ticks_us(), self.deadline)
+        elif late > 0:
+            self.overruns += 1
+            if late > self.max_late_us:
+                self.max_late_us = late
+            if late >= self.period_us:
+                if self._run < self.max_drop:
+                    self._run += 1
+                    self.dropped += 1
+                    self.deadline = time.ticks_add(self.deadline, self.period_us)
+                    return False
+                # надто довго позаду: відправляємо і починаємо розклад від "зараз"
+                self.resyncs += 1
+                self.deadline = time.ticks_add(self.deadline, late)
+                late = 0
+        self._run = 0
+        self.frames += 1
+        self.jitter_sum_us += late
+        if late > self.jitter_max_us:
+            self.jitter_max_us = late
+        self.deadline = time.ticks_add(self.deadline, self.period_us)
+        return True
+
+    def stats(self):
+        return {
+            'fps': 1_000_000 / self.period_us,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'overruns': self.overruns,
+            'resyncs': self.resyncs,
+            'max_late_us': self.max_late_us,
+            'jitter_avg_us': self.jitter_sum_us // self.frames if self.frames else 0,
+            'jitter_max_us': self.jitter_max_us,
+        }
+
+
+def run(frame_fn, fps, present=None, frames=None, sched=None):
+    '''
+    викликає frame_fn() з частотою fps, доки вона не поверне False
+    (або frames кадрів); вертає планувальник зі статистикою.
+    present - відправка кадру (напр. lambda: fb.commit(np)): frame_fn лише
+              оновлює буфер, а пропущені кадри зливаються з наступним;
+    present=None - frame_fn сама малює і відправляє кадр, пропущений кадр
+              не викликається зовсім.
+    '''
+    if sched is None:
+        sched = FrameScheduler(fps)
+    sched.start()
+    n = 0
+    while frames is None or n < frames:
+        n += 1
+        if present is None:
+            if sched.due() and frame_fn() is False:
+                break
+        else:
+            if frame_fn() is False:
+                break
+            if sched.due():
+                present()
+    return sched
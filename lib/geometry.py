@@ -0,0 +1,101 @@
+# geometry.py
+# Геометрія LED-панелі: (i, j) -> індекс на стрічці, плитки, поворот/дзеркало
+# Released under the MIT license
+"""
+Панель n x m (рядки x стовпці) - одна матриця або стіна з плиток
+tile_n x tile_m, з'єднаних у ланцюг (DATA OUT однієї -> DATA IN наступної).
+Таблиця (i, j) -> індекс на стрічці обчислюється один раз у array('H'),
+тож у застосунках це лише індексування - без розгалужень на піксель
+незалежно від розміру стіни:
+
+    geo = Geometry(16, 16)                 # одна матриця 16x16 (як раніше)
+    pix = geo.pix(i, j)                    # == coord_to_pix(i, j)
+
+    # стіна 32x32 з чотирьох 16x16: ланцюг "змійкою", нижній ряд плиток
+    # змонтовано догори дригом (поворот на 180)
+    geo = Geometry(32, 32, tile=(16, 16),
+                   tiles=((0, 0), (0, 1), (1, 1, 180), (1, 0, 180)))
+
+tiles - позиції плиток у порядку ланцюга: (ty, tx[, rot[, flip]]),
+  ty, tx - рядок і стовпець плитки на стіні,
+  rot    - поворот плитки за годинниковою стрілкою: 0, 90, 180, 270
+           (90/270 - лише для квадратних плиток),
+  flip   - дзеркальне відображення плитки по горизонталі (до повороту).
+За замовчуванням плитки йдуть по рядках зліва направо, без поворотів.
+
+Проводка всередині плитки - серпантин цього проєкту: парні рядки
+(0, 2, ..) справа наліво, непарні - зліва направо; serpentine=False -
+усі рядки зліва направо.
+"""
+
+from array import array
+
+
+class Geometry:
+
+    def __init__(self, n=16, m=16, tile=None, tiles=None, serpentine=True):
+        self.n = n
+        self.m = m
+        tn, tm = tile if tile is not None else (n, m)
+        if n % tn or m % tm:
+            raise ValueError("panel {}x{} is not a multiple of tile {}x{}".format(n, m, tn, tm))
+        self.tile = tn, tm
+        if tiles is None:
+            tiles = [(ty, tx) for ty in range(n // tn) for tx in range(m // tm)]
+        if len(tiles) != (n // tn) * (m // tm):
+            raise ValueError("tiles must list every tile of the panel once")
+        self.tiles = tuple(tiles)
+        self.serpentine = serpentine
+        self.table = array('H', bytes(2 * n * m))
+        for k, spec in enumerate(self.tiles):
+            self._build_tile(k, spec)
+
+    def _build_tile(self, k, spec):
+        ty, tx = spec[0], spec[1]
+        rot = spec[2] if len(spec) > 2 else 0
+        flip = spec[3] if len(spec) > 3 else False
+        tn, tm = self.tile
+        if rot % 180 and tn != tm:
+            raise ValueError("rotation by {} needs a square tile".format(rot))
+        # координати на стіні (li, lj) -> "рідні" координати плитки (r, c):
+        # r = r0 + ri * li + rj * lj, c = c0 + ci * li + cj * lj
+        # (зворотний поворот, потім зворотне дзеркало) - коефіцієнти на плитку, не на піксель
+        if rot == 0:
+            r0, ri, rj, c0, ci, cj = 0, 1, 0, 0, 0, 1
+        elif rot == 90:
+            r0, ri, rj, c0, ci, cj = tn - 1, 0, -1, 0, 1, 0
+        elif rot == 180:
+            r0, ri, rj, c0, ci, cj = tn - 1, -1, 0, tm - 1, 0, -1
+        elif rot == 270:
+            r0, ri, rj, c0, ci, cj = 0, 0, 1, tm - 1, -1, 0
+        else:
+            raise ValueError("rotation must be 0, 90, 180 or 270")
+        if flip:
+            c0, ci, cj = tm - 1 - c0, -ci, -cj
+        base = k * tn * tm
+        m = self.m
+        table = self.table
+        serp = self.serpentine
+        for li in range(tn):
+            row = m * (ty * tn + li) + tx * tm
+            for lj in range(tm):
+                r = r0 + ri * li + rj * lj
+                c = c0 + ci * li + cj * lj
+                if serp and not r % 2:
+                    c = tm - 1 - c
+                table[row + lj] = base + tm * r + c
+
+    def __len__(self):
+        return self.n * self.m
+
+    def pix(self, i, j):
+        '''індекс пікселя (i, j) на стрічці (як np[pix])'''
+        return self.table[self.m * i + j]
+
+    def offset(self, i, j):
+        '''зсув байта G пікселя (i, j) у буфері GRB (NeoPixel.buf)'''
+        return 3 * self.table[self.m * i + j]
+
+    def offsets(self):
+        '''таблиця (i, j) -> зсув у буфері GRB, array('H') n * m'''
+        return array('H', (3 * p for p in self.table))
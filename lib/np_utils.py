@@ -0,0 +1,422 @@
+# np_utils.py
+import machine
+import neopixel
+from array import array
+from geometry import Geometry
+
+
+def make_np(pin, n, m):
+    # NeoPixel об'єкт
+    return neopixel.NeoPixel(machine.Pin(pin), n * m)
+
+
+def make_exit_pin(pin):
+    return machine.Pin(pin, machine.Pin.IN, machine.Pin.PULL_UP)
+
+
+def exit_pressed(exit_pin):
+    # PULL_UP: натиснуто = 0
+    return exit_pin.value() == 0
+
+
+def xy_to_i(i, j, m):
+    # серпантин: парні ряди (0,2,4..) справа->ліво
+    return m * i + j if (i % 2) else (m - j - 1 + m * i)
+
+
+def np_clear(np):
+    np.fill((0, 0, 0))
+    np.write()
+
+
+def np_write_matrix(np, mat, n, m):
+    # mat[n][m] = (r,g,b)
+    for i in range(n):
+        base = m * i
+        if i % 2:
+            # зліва направо
+            for j in range(m):
+                np[base + j] = mat[i][j]
+        else:
+            # справа наліво
+            for j in range(m):
+                np[base + (m - 1 - j)] = mat[i][j]
+    np.write()
+
+
+# загальна яскравість (0..1) та гамма LED для всіх Framebuffer/Compositor проєкту -
+# застосовуються в Framebuffer.__init__, змінювати тут (або fb.set_brightness() на ходу).
+# Кольори застосунків приглушені вручну (компоненти до ~24 з 255): гамма > 1 гасить їх
+# майже до нуля, тож гамма 1, доки кольори не задані у повному діапазоні 0..255.
+BRIGHTNESS = 1.0
+LED_GAMMA = 1.0
+
+
+def build_lut(brightness=1.0, gamma=1.0):
+    """
+    256-елементна таблиця (bytes) для яскравості та гамма-корекції:
+    v -> 255 * brightness * (v / 255) ** gamma
+    """
+    return bytes(min(255, int(255 * brightness * (v / 255) ** gamma + 0.5)) for v in range(256))
+
+
+try:
+    import micropython
+
+    @micropython.viper
+    def _lut_copy(dst, src, lut, size: int):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        for k in range(size):
+            d[k] = t[s[k]]
+
+except ImportError:
+    # CPython (host/emu.py): bytearray.translate - той самий прохід по таблиці
+    def _lut_copy(dst, src, lut, size):
+        dst[:size] = src.translate(lut)
+
+
+class Framebuffer:
+    """
+    Кадровий буфер матриці n x m.
+    buf     - плаский bytearray у порядку GRB (як neopixel.NeoPixel.buf),
+    offsets - таблиця (i, j) -> зсув байта у buf, будується один раз з геометрії
+              панелі geo (lib/geometry.py; за замовчуванням одна матриця-серпантин n x m).
+    Кадр малюється у buf, а на стрічку йде одним копіюванням у np.buf (commit).
+
+    commit() порівнює кадр з попереднім закоміченим (shadow) одним порівнянням bytearray:
+      - якщо кадр байт-у-байт той самий — write() не викликається;
+      - інакше кадр відправляється; індекси змінених пікселів (dirty[:changed])
+        рахуються лише при першому читанні changed/dirty (попередній кадр зберігається),
+        тож застосунки, яким вони не потрібні, не платять за попіксельний прохід.
+        З touched (Compositor) перевіряються лише ці пікселі - одразу в commit().
+    Статистика: frames (відправлені кадри), skipped (пропущені), changed (останній кадр).
+
+    Яскравість/гамма: set_brightness() будує таблицю lut (256 байт), через яку
+    кадр проходить один раз при копіюванні у np.buf; новий буфер бере BRIGHTNESS
+    і LED_GAMMA цього модуля. При brightness=1, gamma=1 таблиця не застосовується.
+    """
+
+    def __init__(self, n, m, geo=None):
+        self.n = n
+        self.m = m
+        self.geo = geo if geo is not None else Geometry(n, m)
+        self.buf = bytearray(3 * n * m)
+        self.offsets = self.geo.offsets()
+        self._blank = bytes(len(self.buf))
+        # останній і передостанній закомічені кадри та список змінених пікселів
+        self._shadow = bytearray(len(self.buf))
+        self._prev = bytearray(len(self.buf))
+        self._valid = False
+        self._dirty = array('H', bytes(2 * n * m))
+        self._all = range(n * m)    # один об'єкт range на весь час (без алокацій)
+        self._changed = 0
+        self._pending = False       # changed/dirty ще не пораховані для останнього кадру
+        self.frames = 0
+        self.skipped = 0
+        self.set_brightness(BRIGHTNESS, LED_GAMMA)
+
+    def offset(self, i, j):
+        # зсув байта G пікселя (i, j) у buf
+        return self.offsets[self.m * i + j]
+
+    def set(self, i, j, color):
+        o = self.offsets[self.m * i + j]
+        buf = self.buf
+        buf[o] = color[1]
+        buf[o + 1] = color[0]
+        buf[o + 2] = color[2]
+
+    def get(self, i, j):
+        o = self.offsets[self.m * i + j]
+        buf = self.buf
+        return buf[o + 1], buf[o], buf[o + 2]
+
+    def set_pix(self, pix, color):
+        # pix - індекс на стрічці (як у np[pix])
+        o = 3 * pix
+        buf = self.buf
+        buf[o] = color[1]
+        buf[o + 1] = color[0]
+        buf[o + 2] = color[2]
+
+    def paint(self, offs, color):
+        # offs - послідовність зсувів (див. offset()), усі пікселі одним кольором
+        r, g, b = color
+        buf = self.buf
+        for o in offs:
+            buf[o] = g
+            buf[o + 1] = r
+            buf[o + 2] = b
+
+    def clear(self):
+        self.buf[:] = self._blank
+
+    def fill(self, color):
+        r, g, b = color
+        if r == g == b == 0:
+            self.clear()
+        else:
+            self.buf[:] = bytes((g, r, b)) * (self.n * self.m)
+
+    def write_matrix(self, mat):
+        # mat[n][m] = (r,g,b), аналог np_write_matrix() без розгалуження по рядках
+        offsets = self.offsets
+        buf = self.buf
+        k = 0
+        for row in mat:
+            for r, g, b in row:
+                o = offsets[k]
+                buf[o] = g
+                buf[o + 1] = r
+                buf[o + 2] = b
+                k += 1
+
+    def set_brightness(self, brightness=1.0, gamma=1.0):
+        # можна змінювати "на ходу": таблиці пікселів застосунків не перебудовуються
+        if brightness == 1.0 and gamma == 1.0:
+            self.lut = None
+        else:
+            self.lut = build_lut(brightness, gamma)
+        self.invalidate()
+
+    def invalidate(self):
+        # стрічку змінено в обхід fb (np.fill(), np[i] = ...) - наступний commit() відправить кадр
+        self._valid = False
+
+    def _diff(self, pixels=None):
+        # записує індекси пікселів, якими останній закомічений кадр відрізняється
+        # від попереднього, у dirty, вертає їх кількість
+        # pixels - які пікселі перевіряти (None - усі)
+        cur = self._shadow
+        prev = self._prev
+        dirty = self._dirty
+        cnt = 0
+        for pix in self._all if pixels is None else pixels:
+            o = 3 * pix
+            if cur[o] != prev[o] or cur[o + 1] != prev[o + 1] or cur[o + 2] != prev[o + 2]:
+                dirty[cnt] = pix
+                cnt += 1
+        return cnt
+
+    @property
+    def changed(self):
+        # кількість змінених пікселів останнього commit() (рахується при першому читанні)
+        if self._pending:
+            self._pending = False
+            self._changed = self._diff()
+        return self._changed
+
+    @property
+    def dirty(self):
+        # індекси змінених пікселів: dirty[:changed]
+        self.changed
+        return self._dirty
+
+    def commit(self, np, force=False, touched=None):
+        """
+        Відправляє кадр на стрічку (bulk-copy у np.buf через lut + np.write()).
+        Вертає 0, якщо кадр не змінився і write() пропущено, інакше 1
+        (кількість змінених пікселів - changed, індекси - dirty).
+        touched - якщо відомо, які пікселі могли змінитись (напр. Compositor),
+                  порівнюються лише вони.
+        """
+        if self._valid and not force:
+            if self.buf == self._shadow:
+                self._pending = False
+                self._changed = 0
+                self.skipped += 1
+                return 0
+            # попередній кадр залишається для changed/dirty - обмін буферів без копії
+            self._shadow, self._prev = self._prev, self._shadow
+            self._shadow[:] = self.buf
+            if touched is None:
+                self._pending = True
+            else:
+                self._pending = False
+                self._changed = self._diff(touched)
+        else:
+            self._shadow[:] = self.buf
+            self._pending = False
+            self._changed = self.n * self.m
+            for pix in self._all:
+                self._dirty[pix] = pix
+        self._valid = True
+        if self.lut is None:
+            np.buf[:] = self.buf
+        else:
+            _lut_copy(np.buf, self.buf, self.lut, len(self.buf))
+        np.write()
+        self.frames += 1
+        return 1
+
+
+class Compositor:
+    """
+    Шари кадру за neopixel-індексами pix (як вершини графа у лабіринтах):
+      background - статичний шар (стіни), bytearray у порядку GRB;
+      dynamic    - агенти/сліди: {pix: [колір, ...]}, видно верхній колір.
+    Прибраний з клітинки агент відкриває те, що під ним (інший агент або фон),
+    без читання стрічки назад. commit() перераховує у fb лише змінені клітинки.
+    """
+
+    def __init__(self, n, m, geo=None):
+        self.fb = Framebuffer(n, m, geo)
+        self.background = bytearray(len(self.fb.buf))
+        self.dynamic = {}
+        self._dirty = []
+        self._mark = bytearray(n * m)
+
+    def _touch(self, pix):
+        if not self._mark[pix]:
+            self._mark[pix] = 1
+            self._dirty.append(pix)
+
+    # --- статичний шар
+    def set_background(self, pix, color):
+        o = 3 * pix
+        bg = self.background
+        bg[o] = color[1]
+        bg[o + 1] = color[0]
+        bg[o + 2] = color[2]
+        self._touch(pix)
+
+    def fill_background(self, pixels, color):
+        for pix in pixels:
+            self.set_background(pix, color)
+
+    # --- динамічний шар
+    def put(self, pix, color):
+        # кладе колір поверх клітинки (напр. агент заходить у клітинку)
+        stack = self.dynamic.get(pix)
+        if stack is None:
+            self.dynamic[pix] = [color]
+        else:
+            stack.append(color)
+        self._touch(pix)
+
+    def set(self, pix, color):
+        # замінює все в клітинці одним кольором (напр. слід)
+        self.dynamic[pix] = [color]
+        self._touch(pix)
+
+    def take(self, pix, color):
+        # прибирає верхній екземпляр color з клітинки (агент виходить)
+        stack = self.dynamic.get(pix)
+        if not stack:
+            return
+        for k in range(len(stack) - 1, -1, -1):
+            if stack[k] == color:
+                del stack[k]
+                break
+        if not stack:
+            del self.dynamic[pix]
+        self._touch(pix)
+
+    def move(self, src, dst, color):
+        self.take(src, color)
+        self.put(dst, color)
+
+    def top(self, pix):
+        # видимий динамічний колір клітинки або None (фон)
+        stack = self.dynamic.get(pix)
+        return stack[-1] if stack else None
+
+    def clear(self, pix):
+        if self.dynamic.pop(pix, None) is not None:
+            self._touch(pix)
+
+    def reset(self):
+        # прибрати обидва шари
+        self.background[:] = self.fb._blank
+        self.dynamic.clear()
+        self.fb.clear()
+        for pix in self._dirty:
+            self._mark[pix] = 0
+        self._dirty = []
+        # після reset() змінитись міг будь-який піксель
+        self.fb.invalidate()
+
+    def commit(self, np):
+        buf = self.fb.buf
+        bg = self.background
+        dynamic = self.dynamic
+        mark = self._mark
+        for pix in self._dirty:
+            o = 3 * pix
+            stack = dynamic.get(pix)
+            if stack:
+                r, g, b = stack[-1]
+                buf[o] = g
+                buf[o + 1] = r
+                buf[o + 2] = b
+            else:
+                buf[o] = bg[o]
+                buf[o + 1] = bg[o + 1]
+                buf[o + 2] = bg[o + 2]
+            mark[pix] = 0
+        touched, self._dirty = self._dirty, []
+        # кількість змінених пікселів (серед touched - пораховано одразу)
+        return self.fb.commit(np, touched=touched) and self.fb.changed
+
+
+def koord_by_dot_rect(n, m, dot_rect):
+    """
+    0 → 2х2, центр 
+    1 → 4×4,
+    ...
+    4 → 10×10 (координати i,j у межах 3..12),
+    dot_rect = None -> вся матриця.
+    """
+    if dot_rect is None:
+        return [(i, j) for i in range(n) for j in range(m)]
+
+    max_idx = (min(n, m) - 1) // 2
+    if dot_rect < 0:
+        dot_rect = 0
+    if dot_rect > max_idx:
+        dot_rect = max_idx
+
+    margin = max_idx - dot_rect
+    i0, i1 = margin, n - margin
+    j0, j1 = margin, m - margin
+    return [(i, j) for i in range(i0, i1) for j in range(j0, j1)]
+
+def koord_by_dot_rect_perimeter(n, m, dot_rect):
+
+    max_idx = (min(n, m) - 1) // 2
+
+    if dot_rect < 0:
+        dot_rect = 0
+    if dot_rect > max_idx:
+        dot_rect = max_idx
+
+    margin = max_idx - dot_rect
+
+    i0 = margin
+    i1 = n - margin - 1
+    j0 = margin
+    j1 = m - margin - 1
+
+    coords = []
+
+    # верх
+    for j in range(j0, j1 + 1):
+        coords.append((i0, j))
+
+    # низ
+    for j in range(j0, j1 + 1):
+        coords.append((i1, j))
+
+    # ліва
+    for i in range(i0 + 1, i1):
+        coords.append((i, j0))
+
+    # права
+    for i in range(i0 + 1, i1):
+        coords.append((i, j1))
+
+    return coords
+
+
@@ -0,0 +1,32 @@
+# panel.py
+# Панель проєкту: розмір, плитки і проводка - одне місце для всіх застосунків
+# Released under the MIT license
+"""
+Застосунки не задають розмір панелі самі, а імпортують його звідси разом
+з готовою геометрією (lib/geometry.py):
+
+    from panel import n, m, geo, coord_to_pix
+
+Інша панель - зміна лише в цьому файлі, напр. стіна 32x32 з чотирьох
+матриць 16x16, нижній ряд плиток змонтовано догори дригом:
+
+    n = 32
+    m = 32
+    tile = 16, 16
+    tiles = (0, 0), (0, 1), (1, 1, 180), (1, 0, 180)
+
+Формат tile / tiles / serpentine - як у Geometry.
+"""
+
+from geometry import Geometry
+
+n = 16              # number of row
+m = 16              # number of col
+tile = None         # (рядки, стовпці) плитки; None - одна матриця n x m
+tiles = None        # плитки у порядку ланцюга: (ty, tx[, rot[, flip]]); None - по рядках
+serpentine = True   # проводка "змійкою" всередині плитки
+
+# таблиця (i, j) -> індекс на стрічці обчислюється один раз на всі застосунки
+geo = Geometry(n, m, tile, tiles, serpentine)
+coord_to_pix = geo.pix
+coord_to_offset = geo.offset
@@ -0,0 +1,123 @@
+# sprite.py
+# Компілятор спрайтів: таблиці координат (i, j) -> зсуви у кадровому буфері
+# Released under the MIT license
+"""
+Спрайт - набір пікселів фігури, скомпільований один раз:
+  offsets - array('H') відсортованих зсувів у buf (GRB, 3 байти на піксель),
+  spans   - array('H') пар (start, end): неперервні ділянки buf.
+Рядок фігури на матриці-"змійці" - це неперервна ділянка стрічки,
+тому малювання - це кілька зрізових копіювань (memcpy), а не цикл по пікселях:
+
+    body = from_coords(body_pos, fb.offset)
+    body.fill(fb.buf, color)          # суцільний колір
+    layer = body.render(color)        # попередньо відрендерений шар
+    body.blit(fb.buf, layer)          # копіювання шару по масці спрайта
+
+Таблиці можна "заморозити" у .py (freeze()) і на старті лише імпортувати (load()).
+"""
+
+from array import array
+
+MAX_RUN = 96  # байт (32 пікселі) - найдовша ділянка; довші розбиваються
+
+_solid = {}   # color -> memoryview зразка (g, r, b) * MAX_RUN/3
+
+
+def _pattern(color):
+    mv = _solid.get(color)
+    if mv is None:
+        r, g, b = color
+        mv = memoryview(bytes((g, r, b)) * (MAX_RUN // 3))
+        _solid[color] = mv
+    return mv
+
+
+def build_spans(offsets):
+    '''відсортовані зсуви пікселів -> [start, end, start, end, ...] неперервних ділянок'''
+    spans = []
+    start = end = None
+    for o in offsets:
+        if start is not None and o == end and end - start < MAX_RUN:
+            end = o + 3
+        else:
+            if start is not None:
+                spans.append(start)
+                spans.append(end)
+            start, end = o, o + 3
+    if start is not None:
+        spans.append(start)
+        spans.append(end)
+    return spans
+
+
+class Sprite:
+
+    def __init__(self, offsets, spans=None):
+        if spans is None:
+            self.offsets = array('H', sorted(set(offsets)))
+            self.spans = array('H', build_spans(self.offsets))
+        else:
+            # вже скомпільовані (freeze/load)
+            self.offsets = array('H', offsets)
+            self.spans = array('H', spans)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def union(self, *others):
+        offs = list(self.offsets)
+        for s in others:
+            offs.extend(s.offsets)
+        return Sprite(offs)
+
+    def fill(self, buf, color):
+        # суцільний колір: одне зрізове копіювання на ділянку
+        mv = _pattern(color)
+        spans = self.spans
+        for k in range(0, len(spans), 2):
+            a = spans[k]
+            b = spans[k + 1]
+            buf[a:b] = mv[:b - a]
+
+    def render(self, color, size=None, layer=None):
+        '''попередньо відрендерений шар (bytearray розміру кадру) з пікселями спрайта кольору color'''
+        if layer is None:
+            layer = bytearray(size if size is not None else self.offsets[-1] + 3)
+        self.fill(layer, color)
+        return layer
+
+    def blit(self, buf, layer):
+        # копіює з шару лише пікселі спрайта (маска = spans)
+        mv = memoryview(layer)
+        spans = self.spans
+        for k in range(0, len(spans), 2):
+            a = spans[k]
+            b = spans[k + 1]
+            buf[a:b] = mv[a:b]
+
+
+def from_coords(coords, offset):
+    '''coords - ((i, j), ...), offset(i, j) - зсув у buf (напр. Framebuffer.offset)'''
+    return Sprite(offset(i, j) for i, j in coords)
+
+
+def freeze(path, sprites):
+    '''записує словник {name: Sprite} у .py модуль для load()'''
+    with open(path, 'w') as f:
+        f.write('# generated by sprite.freeze() - do not edit\n')
+        f.write('from array import array\n\n')
+        f.write('SPRITES = {\n')
+        for name in sorted(sprites):
+            s = sprites[name]
+            f.write('    {!r}: (array(\'H\', {}), array(\'H\', {})),\n'.format(
+                name, list(s.offsets), list(s.spans)))
+        f.write('}\n')
+
+
+def load(module_name):
+    '''{name: Sprite} із замороженого модуля або None, якщо модуля немає'''
+    try:
+        mod = __import__(module_name)
+    except ImportError:
+        return None
+    return {name: Sprite(offs, spans) for name, (offs, spans) in mod.SPRITES.items()}
@@ -0,0 +1,86 @@
+# stage_times.py
+# Час етапів кадру в кільцевих буферах array: без print() і без алокацій у циклі
+# Released under the MIT license
+"""
+Кожне ядро має власний StageTimes (ядро пише лише у свій об'єкт - без блокувань):
+
+    prof = StageTimes(('cap', 'fft', 'publish'), size=128)
+    while True:
+        prof.begin()              # початок кадру (і період попереднього кадру)
+        buf = cap.get()
+        prof.mark(0)              # 'cap'  - час від begin()
+        spectr = fastfft.rfft(buf, True)
+        prof.mark(1)              # 'fft'  - час від попередньої mark()
+        ...
+
+mark()/begin() лише пишуть ticks_diff() у заздалегідь виділений array('i')
+(останні size кадрів на етап); зведення рахується на вимогу:
+
+    prof.summary()    # {'cap': (min, mean, p95, max), ..., 'period': (...), 'fps': ...}
+    prof.report('core0')   # те саме рядками (REPL / UART)
+"""
+
+import time
+from array import array
+
+
+class StageTimes:
+
+    def __init__(self, stages, size=128):
+        self.stages = tuple(stages)
+        self.size = size
+        n = len(self.stages) + 1          # останній ряд - період кадру
+        self.ring = array('i', bytes(4 * n * size))
+        self.count = 0                    # завершених кадрів (усього)
+        self._pos = 0
+        self._frame = None                # ticks_us() початку поточного кадру
+        self._last = 0
+
+    def begin(self):
+        '''початок кадру; період попереднього кадру йде в ряд 'period' '''
+        now = time.ticks_us()
+        if self._frame is not None:
+            self.ring[len(self.stages) * self.size + self._pos] = time.ticks_diff(now, self._frame)
+            self.count += 1
+            self._pos = (self._pos + 1) % self.size
+        self._frame = now
+        self._last = now
+
+    def mark(self, k):
+        '''кінець етапу k (номер у stages): час від попередньої mark() або begin()'''
+        now = time.ticks_us()
+        self.ring[k * self.size + self._pos] = time.ticks_diff(now, self._last)
+        self._last = now
+
+    def reset(self):
+        self.count = 0
+        self._pos = 0
+        self._frame = None
+
+    def _row(self, k, n):
+        base = k * self.size
+        s = sorted(self.ring[base:base + n])
+        return s[0], sum(s) // n, s[min(n - 1, (95 * n) // 100)], s[-1]
+
+    def summary(self):
+        '''(min, mean, p95, max) мкс для кожного етапу і періоду кадру за останні size кадрів; fps'''
+        n = min(self.count, self.size)
+        if n == 0:
+            return {}
+        out = {}
+        for k, name in enumerate(self.stages):
+            out[name] = self._row(k, n)
+        period = self._row(len(self.stages), n)
+        out['period'] = period
+        out['fps'] = 1_000_000 / period[1] if period[1] else 0.0
+        return out
+
+    def report(self, title=''):
+        s = self.summary()
+        if not s:
+            print(title, 'no frames yet')
+            return
+        print('{} frames: {}  fps: {:.1f}'.format(title, self.count, s['fps']))
+        print('  {:<8}{:>8}{:>8}{:>8}{:>8}'.format('us', 'min', 'mean', 'p95', 'max'))
+        for name in self.stages + ('period',):
+            print('  {:<8}{:>8}{:>8}{:>8}{:>8}'.format(name, *s[name]))